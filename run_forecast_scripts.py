@@ -8,10 +8,31 @@ This python script will combine a bunch of steps (true/false switches) in creati
 Things you will need to change after downloading this to your computer:
   - change true/false switches according to what you want executed
   - change true/false switched_download.txt according to what you want to download
+
+All the steps run in this python process: the scripts of ./supplementary/ are imported once (with numpy, PIL, requests, ...), and their
+main() is called, with the switches passed on in memory. The worker processes that crop the images are started once, and kept for all
+the steps (image_tools.openImagePool).
+
+With use_task_graph, the steps are run as a task graph (supplementary/task_graph.py): the images of each product are cropped as soon as
+they are downloaded, and joined into movies as soon as they are cropped, while the other products are still downloading. The critical
+path of the run is printed at the end.
+
+With watch_mode, the script keeps running: after a first full run, it asks the websites of each product (HEAD requests, see
+download_daily_images_all.changedSwitches) every few minutes (watch_intervals) whether they have published new images, and only
+downloads, crops, joins and moves the products that have. The archive and a full run are done again when the day changes.
+
+Updates:
+ - 2026-10-18: Added the task graph (use_task_graph).
+ - 2026-10-18: The scripts are imported and run in this process (main), instead of starting a new python for each of them.
+ - 2026-10-18: Added the watch mode (watch_mode), which only runs the products that have new images on their websites.
 """
 
+from datetime import date
+import importlib
 import os
-import subprocess
+import sys
+import threading
+import time
 
 
 #os_system='Windows'
@@ -21,54 +42,298 @@ os_system='Mac'
 change_work_dir=True
 run_archive=True
 run_download=True
+download_missing_only=False # only download the images that are not in ./figs/ yet (e.g. when re-running after a failed download)
 run_animations=True
 run_processing=True
+use_task_graph=True # run each product as soon as its images are there (download -> crop -> join -> move), instead of one stage after the other
+watch_mode=False # keep running, and only run the products that have new images on their websites (stop with Ctrl-C)
+watch_interval=900 # seconds between two looks at the website of a product, in watch mode
+watch_intervals={'ECMWF_prediction': 600, # products that are published in the morning are looked at more often
+                 'mpas_outlook': 600,
+                 'nasa_geos': 600,
+                 'uwincm_650mbRH_animation': 300,
+                 'uwincm_boundaryLayer_animation': 300,
+                 'uwincm_clouds_animation': 300,
+                 'uwincm_precipitation_animation': 300,
+                 'uwincm_surfaceWind_animation': 300,
+                 'GOES16_sat': 300,
+                 'meteosat_sat': 300}
+
+# switches whose cropped images are joined together (into the IRC image and the joint movies of crop_edit_daily_images.py)
+joined_switches=[['meteosat_sat', 'GOES16_sat']]
+joint_movie_switches=[['ECMWF_prediction'],
+                      ['mpas_outlook'],
+                      ['nasa_geos'],
+                      ['uwincm_surfaceWind_animation', 'uwincm_650mbRH_animation'],
+                      ['uwincm_clouds_animation', 'uwincm_boundaryLayer_animation'],
+                      ['uwincm_precipitation_animation', 'uutah_precipitation_animation', 'UTAH_website', 'ucdavis_precipitation_animation']]
 
 cwd = os.getcwd()
+sys.path.insert(0, os.path.join(cwd,'supplementary'))
+
+
+def stageModule(script):
+  """
+  stageModule(script)
+
+  Imports a script of ./supplementary/ (its _windows copy on Windows, if there is one), so its main() can be called.
+  """
+
+  if os_system=='Windows' and os.path.isfile(os.path.join(cwd,'supplementary',script+'_windows.py')):
+    script = script + '_windows'
+
+  return importlib.import_module(script)
+
+
+def readSwitchFile(fileName):
+  """
+  readSwitchFile(fileName)
+
+  Returns the True/False switches in a switch file (e.g. switches_download.txt).
+  """
+
+  switches = {}
+  with open(fileName, 'r') as fl:
+    for line in fl:
+      if ' = ' in line:
+        switch_name, switch_setting = line.rstrip().split(' = ')
+        switches[switch_name] = switch_setting.strip() == 'True'
+
+  return switches
+
+
+def forecastGraph(stages, switches, only=None):
+  """
+  forecastGraph(stages, switches, only)
+
+  Returns the steps (GraphNodes) of the forecast: archive, download, and for each product, waiting until its images are downloaded,
+  cropping them, joining them into movies, and moving the final images to ./figs_final/ (publish).
+
+  Parameters:
+  - stages: the imported scripts (archive, download, animations, crop)
+  - switches: dictionary that gets the switches of switches_process.txt, as the downloads of each switch are done
+  - only: the switches that are downloaded, cropped and joined (e.g. the ones with new images, in watch mode), None for all of them.
+          The archive is only done for all of them.
+  """
+
+  from task_graph import GraphNode
+  from product_geometry import switchGroups
+
+  download_switches = readSwitchFile(os.path.join(cwd,'supplementary','switches_download.txt'))
+  on = [switch_name for switch_name in download_switches if download_switches[switch_name] and (only is None or switch_name in only)]
+  downloaded = {switch_name: threading.Event() for switch_name in on}
+  nodes = []
+
+  def archive():
+    stages['archive'].main()
+    return True
+
+  def switchDownloaded(switch_name, switch_setting):
+    switches[switch_name] = switch_setting
+    if switch_name in downloaded:
+      downloaded[switch_name].set()
+
+  def download():
+    try:
+      stages['download'].main(True if download_missing_only else None, on_switch_done=switchDownloaded, only=only)
+      return True
+    finally:
+      # the switches that were not downloaded are False (not in switches)
+      for event in downloaded.values():
+        event.set()
+
+  def animations():
+    stages['animations'].main(switches={switch_name: switches[switch_name] and (only is None or switch_name in only) for switch_name in switches})
+    return True
+
+  def crop(stage, only):
+    stages['crop'].main([stage], only=only, switches=switches)
+    return True
+
+  if run_archive and only is None:
+    nodes.append(GraphNode('archive', archive))
+
+  if run_download:
+    nodes.append(GraphNode('download', download, after=[node.name for node in nodes]))
+  else:
+    switches.update(readSwitchFile(os.path.join(cwd,'supplementary','switches_process.txt')))
+    for event in downloaded.values():
+      event.set()
+
+  for switch_name in on:
+    nodes.append(GraphNode('downloaded:' + switch_name, downloaded[switch_name].wait))
+
+  if run_animations:
+    nodes.append(GraphNode('animations', animations, after=['download'] if run_download else [], resource='cpu'))
+
+  if run_processing:
+    crop_nodes = []
+    for group in switchGroups(joined_switches):
+      after = ['downloaded:' + switch_name for switch_name in group if switch_name in on]
+      if len(after) == 0:
+        continue
+      if run_animations and 'nasa_geos' in group:
+        # the GEOS 700 mb movie is made by create_animations.py
+        after.append('animations')
+      name = 'crop:' + '+'.join(switch_name for switch_name in group if switch_name in on)
+      nodes.append(GraphNode(name, lambda group=group: crop('process', group), after=after, resource='cpu'))
+      crop_nodes.append((group, name))
+
+    join_nodes = []
+    for group in joint_movie_switches:
+      after = [name for crop_group, name in crop_nodes if len(set(crop_group) & set(group)) > 0]
+      if len(after) == 0:
+        continue
+      name = 'join:' + '+'.join(switch_name for switch_name in group if switch_name in on)
+      nodes.append(GraphNode(name, lambda group=group: crop('join', group), after=after, resource='cpu'))
+      join_nodes.append(name)
+
+    nodes.append(GraphNode('publish', lambda: crop('move', None), after=[name for group, name in crop_nodes] + join_nodes, skip=False))
+
+  return nodes
+
+
+def watchForecast(stages):
+  """
+  watchForecast(stages)
+
+  Runs the forecast over and over (watch mode): a full run first (and again when the day changes), then, each time the poll interval
+  of a product is up, only the products whose websites have new images (changedSwitches) are downloaded, cropped, joined and moved.
+
+  Parameters:
+  - stages: the imported scripts (archive, download, animations, crop)
+  """
+
+  from task_graph import printCriticalPath, runGraph
+
+  switches = {} # the switches of switches_process.txt, kept from one run to the next
+  refreshed = {} # the sources (urls, GEOS pages) of each switch when it was last downloaded
+  next_check = {}
+  day = None
+  full_run_due = True # the first run of the day downloads and processes all the products
+
+  while True:
+    if date.today() != day:
+      # a new day: new urls for all the products, and yesterday's images are archived
+      day = date.today()
+      refreshed = {}
+      next_check = {}
+      full_run_due = True
+
+    download_switches = readSwitchFile(os.path.join(cwd,'supplementary','switches_download.txt'))
+    now = time.time()
+    due = [switch_name for switch_name in download_switches if download_switches[switch_name] and next_check.get(switch_name, 0) <= now]
+
+    if len(due) > 0:
+      changed = stages['download'].changedSwitches(due, refreshed)
+      for switch_name in due:
+        next_check[switch_name] = now + watch_intervals.get(switch_name, watch_interval)
+
+      if len(changed) > 0:
+        print(" ")
+        print(" ")
+        print(" ")
+        print("... " + time.strftime('%H:%M') + " New images for " + ', '.join(changed) + ".")
+        nodes = forecastGraph(stages, switches, only=None if full_run_due else list(changed))
+        results = runGraph(nodes, limits={'cpu': 1})
+        full_run_due = False
+        print(" ")
+        printCriticalPath(nodes, results)
+
+        # the switches that did not download are asked for again at their next poll
+        for switch_name in changed:
+          if switches.get(switch_name, False):
+            refreshed[switch_name] = changed[switch_name]
+
+    if len(next_check) > 0:
+      time.sleep(max(0, min(next_check.values()) - time.time()))
+    else:
+      time.sleep(watch_interval)
+
+
+def main():
+  """
+  main()
+
+  Runs the steps of the forecast template that are switched on, in this process.
+  """
+
+  if change_work_dir:
+    print(" ")
+    print(" ")
+    print(" ")
+    print("... Changing working directory to CPEX forecast template.")
+    cmd = ['cd ' + cwd]
+    os.system(' '.join(cmd))
+
+  # the scripts (and numpy, PIL, requests, ...) are imported once, for all the steps
+  from image_tools import closeImagePool, openImagePool
+  stages = {'archive': stageModule('archive_yesterdays_images'),
+            'download': stageModule('download_daily_images_all'),
+            'animations': stageModule('create_animations'),
+            'crop': stageModule('crop_edit_daily_images')}
+  openImagePool(stages['crop'].image_workers)
+
+  try:
+    if watch_mode:
+      print(" ")
+      print(" ")
+      print(" ")
+      print("... Watching the websites for new images (Ctrl-C to stop).")
+      watchForecast(stages)
+
+    elif use_task_graph:
+      from task_graph import printCriticalPath, runGraph
+
+      print(" ")
+      print(" ")
+      print(" ")
+      print("... Running the forecast steps as a task graph.")
+      nodes = forecastGraph(stages, {})
+      results = runGraph(nodes, limits={'cpu': 1})
+      print(" ")
+      printCriticalPath(nodes, results)
+
+    else:
+      # the switches of switches_process.txt, passed on from the download (None: each step reads the file)
+      switches = None
+
+      if run_archive:
+        print(" ")
+        print(" ")
+        print(" ")
+        print("... Archiving yesterday's imagery.")
+        stages['archive'].main()
+
+
+      if run_download:
+        print(" ")
+        print(" ")
+        print(" ")
+        print("... Running " + stages['download'].__name__ + ".py")
+        switches = stages['download'].main(True if download_missing_only else None)
+
+
+      if run_animations:
+        print(" ")
+        print(" ")
+        print(" ")
+        print("... Running " + stages['animations'].__name__ + ".py")
+        stages['animations'].main(switches=switches)
+
+
+      if run_processing:
+        print(" ")
+        print(" ")
+        print(" ")
+        print("... Running " + stages['crop'].__name__ + ".py")
+        stages['crop'].main(switches=switches)
+
+  finally:
+    closeImagePool()
+
+  return
+
 
-if change_work_dir:
-  print(" ")
-  print(" ")
-  print(" ")
-  print("... Changing working directory to CPEX forecast template.")
-  cmd = ['cd ' + cwd]
-  os.system(' '.join(cmd))
-
-
-if run_archive:
-  print(" ")
-  print(" ")
-  print(" ")
-  print("... Archiving yesterday's imagery.")
-  cmd = ['python ' + os.path.join(cwd,'supplementary','archive_yesterdays_images.py')]
-  os.system(' '.join(cmd))
-
-
-if run_download:
-  print(" ")
-  print(" ")
-  print(" ")
-  print("... Running download_daily_images_all.py")
-  if os_system=='Mac' or os_system=='Linux': cmd = ['python ' + os.path.join(cwd,'supplementary','download_daily_images_all.py')]
-  if os_system=='Windows': cmd = ['python ' + os.path.join(cwd,'supplementary','download_daily_images_all_windows.py')]
-  os.system(' '.join(cmd))
-
-
-if run_animations:
-  print(" ")
-  print(" ")
-  print(" ")
-  print("... Running create_animations.py")
-  if os_system=='Mac' or os_system=='Linux': cmd = ['python ' + os.path.join(cwd,'supplementary','create_animations.py')]
-  if os_system=='Windows': cmd = ['python ' + os.path.join(cwd,'supplementary','create_animations_windows.py')]
-  os.system(' '.join(cmd))
-
-
-if run_processing:
-  print(" ")
-  print(" ")
-  print(" ")
-  print("... Running crop_edit_daily_images.py")
-  if os_system=='Mac' or os_system=='Linux': cmd = ['python ' + os.path.join(cwd,'supplementary','crop_edit_daily_images.py')]
-  if os_system=='Windows': cmd = ['python ' + os.path.join(cwd,'supplementary','crop_edit_daily_images_windows.py')]
-  os.system(' '.join(cmd))
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,372 @@
+"""
+This module makes the .gif animations of create_animations.py and crop_edit_daily_images.py (and their _windows copies).
+
+The frames are given as an iterator of images, and each one is encoded and written to the .gif as soon as it is read, so only one
+frame is kept in memory, and no image files are written besides the animation itself. Each frame has its own duration: the last
+frame is shown longer (frameDurations), instead of being copied nDup times to new image files.
+
+With a shared palette (sharedPalette, or animateFiles(..., optimize=True)), all frames use the same colors, and only the part of each
+frame that changed since the previous one is stored (the rest of it is transparent, and the previous frame is left in place).
+This makes the movies, where most of the map does not change from frame to frame, a lot smaller.
+
+The same frames can also be written to .mp4 (H.264) or .webm (VP9) videos (videoFrames, writeVideo, or the formats of animateFiles),
+which are a lot smaller than the .gif. The videos need cv2 (opencv-python); without it, only the .gif animations are written.
+
+A frame can also be a pair of images (e.g. the cropped 700 and 850 mb maps of the same time), which are read and joined side by side
+in memory (loadFrames), so the joint movies are made straight from the cropped images, without writing the joined frames.
+
+With animateFiles(..., cached=True), a movie whose frames and settings did not change since it was written is not written again (stage_cache.py).
+
+Required packages: os, tempfile, PIL, image_tools and stage_cache (in this directory), cv2 and numpy (optional, for the videos).
+
+
+Updates:
+ - 2026-10-18: Created.
+ - 2026-10-18: Added the shared palette / changed part of frame mode (sharedPalette, optimize in animateFiles).
+ - 2026-10-18: Added the .mp4/.webm videos (videoFrames, writeVideo, formats in animateFiles).
+ - 2026-10-18: Frames can be tuples of images, joined side by side in memory (loadFrames).
+ - 2026-10-18: animateFiles can skip the movies whose frames and settings did not change (cached).
+"""
+
+import os
+import tempfile
+
+from PIL import GifImagePlugin, Image, ImageChops
+
+from image_tools import joinImages, loadImage
+from stage_cache import isCurrent, rememberOutputs, stageDigest
+
+try:
+  import cv2
+  import numpy
+except ImportError:
+  cv2 = None
+
+
+palette_samples = 3 # number of frames (first, middle, last, ...) the shared palette of a movie is made from
+transparent_index = 255 # palette index left free in the shared palette, for the unchanged parts of the frames
+video_codecs = {'.mp4': ['avc1', 'mp4v'], '.webm': ['VP90']} # codecs (fourcc) tried for each video format, in order: H.264 (MPEG-4 part 2 if cv2 has no H.264 encoder), VP9
+
+
+def animationFiles(fileDir, imageNameRoot):
+  """
+  animationFiles(fileDir, imageNameRoot)
+
+  Returns the complete paths and names of the frames of an animation (the images with imageNameRoot in their name), in order.
+  """
+
+  return [os.path.join(fileDir,fl) for fl in sorted(os.listdir(fileDir)) if imageNameRoot in fl]
+
+
+def frameDurations(nFrames, delay=500, nDup=3):
+  """
+  frameDurations(nFrames, delay, nDup)
+
+  Returns the duration of every frame (in ms): the last frame stays as long as nDup more frames would.
+
+  Parameters:
+  - nFrames: number of frames
+  - delay: duration of one frame, in ms
+  - nDup: number of frames the last frame is extended by
+  """
+
+  if nFrames == 0:
+    return []
+
+  return [delay for num in range(nFrames-1)] + [delay*(nDup+1)]
+
+
+def loadFrames(fileNames):
+  """
+  loadFrames(fileNames)
+
+  Reads the images one by one, as they are needed (each one is decoded once), and yields them as RGB PIL images.
+  A tuple of names is one frame: the images are joined side by side (top aligned, like convert +append).
+  """
+
+  for fileName in fileNames:
+    if isinstance(fileName, tuple):
+      frame = joinImages([loadImage(fl) for fl in fileName])
+    else:
+      frame = loadImage(fileName)
+    yield frame
+
+
+def sharedPalette(frames, colors=255):
+  """
+  sharedPalette(frames, colors)
+
+  Returns a 'P' image with the palette shared by all the frames of a movie, made from the given (sample) frames.
+  Only colors entries are used, so that the last one (transparent_index) is left for the unchanged parts of the frames.
+
+  Parameters:
+  - frames: iterator of PIL images the colors are taken from (e.g. the first, middle and last frame)
+  - colors: number of colors in the palette (at most 255)
+  """
+
+  frames = [frame.convert('RGB') for frame in frames]
+  sample = Image.new('RGB', (max(frame.width for frame in frames), sum(frame.height for frame in frames)))
+  offset = 0
+  for frame in frames:
+    sample.paste(frame, (0, offset))
+    offset += frame.height
+
+  palette = sample.quantize(colors).getpalette()[:3*colors]
+  nColors = len(palette)//3
+
+  # the unused entries repeat the first color, so they are never the only closest color to a pixel
+  paletteImage = Image.new('P', (1, 1))
+  paletteImage.putpalette(palette + palette[:3]*(256-nColors))
+  paletteImage.info['colors'] = nColors
+
+  return paletteImage
+
+
+def paletteFrame(frame, palette):
+  """
+  paletteFrame(frame, palette)
+
+  Returns the frame with the colors of the shared palette (without dithering, so the parts that do not change stay the same).
+  """
+
+  nColors = palette.info['colors']
+  frame = frame.convert('RGB').quantize(palette=palette, dither=Image.NONE)
+
+  return frame.point([ind if ind < nColors else 0 for ind in range(256)])
+
+
+def writeAnimation(frames, durations, outName, loop=0, palette=None):
+  """
+  writeAnimation(frames, durations, outName, loop, palette)
+
+  Writes the frames to a .gif animation, one at a time, as they come from the iterator. The animation is written to a temporary file
+  first, and renamed to outName when it is complete. Returns True if the animation was written (False if there were no frames).
+
+  Parameters:
+  - frames: iterator of PIL images (e.g. loadFrames(fileNames))
+  - durations: list of the duration of each frame, in ms (e.g. frameDurations(nFrames))
+  - outName: the complete path and name of the animation (e.g. ./figs_cropped/something.gif)
+  - loop: 0 means repeating
+  - palette: shared palette of all the frames (from sharedPalette), then only the part of each frame that changed is stored;
+             None gives each frame its own palette, and stores all of it
+  """
+
+  fd, tmpName = tempfile.mkstemp(prefix='.animation_', suffix='.tmp', dir=os.path.dirname(outName) or '.')
+  count = 0
+  previous = None
+  try:
+    with os.fdopen(fd, 'wb') as fp:
+      for frame, duration in zip(frames, durations):
+        if palette is None:
+          frame = frame.convert('RGB').convert('P', palette=Image.ADAPTIVE)
+          if count == 0:
+            # the palette of the first frame is the global one, the other frames have their own
+            header, used_colors = GifImagePlugin.getheader(frame, info={'loop': loop, 'duration': duration})
+            blocks = header + GifImagePlugin.getdata(frame, duration=duration)
+          else:
+            blocks = GifImagePlugin.getdata(frame, duration=duration, include_color_table=True)
+
+        else:
+          frame = paletteFrame(frame, palette)
+          # disposal 1: each frame is drawn over the previous one, which stays where the frame is transparent
+          if previous is None:
+            header, used_colors = GifImagePlugin.getheader(frame, info={'loop': loop, 'duration': duration, 'transparency': transparent_index})
+            blocks = header + GifImagePlugin.getdata(frame, duration=duration, disposal=1)
+          else:
+            changed = ImageChops.difference(Image.frombytes('L', frame.size, frame.tobytes()), Image.frombytes('L', previous.size, previous.tobytes()))
+            box = changed.getbbox()
+            if box is None:
+              # nothing changed, a single transparent pixel keeps the previous frame on for duration
+              box = (0, 0, 1, 1)
+              part = Image.new('P', (1, 1), transparent_index)
+            else:
+              part = frame.crop(box)
+              part.paste(transparent_index, mask=changed.crop(box).point(lambda diff: 255 if diff == 0 else 0, '1'))
+            part.putpalette(palette.getpalette())
+            blocks = GifImagePlugin.getdata(part, offset=box[:2], duration=duration, disposal=1, transparency=transparent_index)
+          previous = frame
+
+        for block in blocks:
+          fp.write(block)
+        count += 1
+      fp.write(b';')
+
+    if count == 0:
+      os.remove(tmpName)
+      return False
+
+    os.chmod(tmpName, 0o644)
+    os.replace(tmpName, outName)
+  except Exception:
+    if os.path.exists(tmpName):
+      os.remove(tmpName)
+    raise
+
+  return True
+
+
+def openVideo(outName, size, fps):
+  """
+  openVideo(outName, size, fps)
+
+  Opens a video for writing with the first codec of its format (video_codecs) that cv2 can use. Returns the cv2.VideoWriter,
+  or None if none of them can be used.
+
+  Parameters:
+  - outName: the complete path and name of the video (the format is given by the extension, e.g. .mp4)
+  - size: (width, height) of the video, both even
+  - fps: frames per second
+  """
+
+  for codec in video_codecs.get(os.path.splitext(outName)[1].lower(), []):
+    video = cv2.VideoWriter(outName, cv2.VideoWriter_fourcc(*codec), fps, size)
+    if video.isOpened():
+      return video
+    video.release()
+
+  return None
+
+
+def videoFrames(frames, durations, videoNames, delay=500):
+  """
+  videoFrames(frames, durations, videoNames, delay)
+
+  Yields the frames, and writes each one to the videos on the way, so the same frames (read once) can be written to a .gif
+  animation and to videos at the same time. A video has a fixed frame rate (one frame every delay ms), so a frame that is shown
+  longer (the last one) is repeated. The videos are written to temporary files first, and renamed to videoNames once all the
+  frames went through.
+
+  Parameters:
+  - frames: iterator of PIL images (e.g. loadFrames(fileNames))
+  - durations: list of the duration of each frame, in ms (e.g. frameDurations(nFrames))
+  - videoNames: the complete paths and names of the videos (.mp4 or .webm)
+  - delay: duration of one video frame, in ms
+  """
+
+  if cv2 is None:
+    for outName in videoNames:
+      print('... ... cv2 is not installed - cannot create ' + os.path.basename(outName))
+    for frame, duration in zip(frames, durations):
+      yield frame
+    return
+
+  videos = None
+  tmpNames = []
+  try:
+    for frame, duration in zip(frames, durations):
+      if videos is None:
+        # H.264 and VP9 need an even width and height
+        size = (frame.width + frame.width % 2, frame.height + frame.height % 2)
+        videos = []
+        for outName in videoNames:
+          fd, tmpName = tempfile.mkstemp(prefix='.video_', suffix=os.path.splitext(outName)[1], dir=os.path.dirname(outName) or '.')
+          os.close(fd)
+          tmpNames.append(tmpName)
+          video = openVideo(tmpName, size, 1000/delay)
+          if video is None:
+            print('... ... No codec for ' + os.path.basename(outName) + ' - cannot create video')
+          videos.append(video)
+
+      image = frame.convert('RGB')
+      if image.size != size:
+        image = Image.new('RGB', size, 'white')
+        image.paste(frame.convert('RGB'), (0, 0))
+      # cv2 takes the colors as BGR
+      array = numpy.asarray(image)[:, :, ::-1]
+      for video in videos:
+        if video is not None:
+          for num in range(max(1, round(duration/delay))):
+            video.write(array)
+
+      yield frame
+
+    for outName, tmpName, video in zip(videoNames, tmpNames, videos or []):
+      if video is not None:
+        video.release()
+        os.chmod(tmpName, 0o644)
+        os.replace(tmpName, outName)
+  finally:
+    for num, tmpName in enumerate(tmpNames):
+      if videos is not None and videos[num] is not None:
+        videos[num].release()
+      if os.path.exists(tmpName):
+        os.remove(tmpName)
+
+
+def writeVideo(frames, durations, outName, delay=500):
+  """
+  writeVideo(frames, durations, outName, delay)
+
+  Writes the frames to a video (.mp4 or .webm), one at a time, as they come from the iterator. Returns True if the video was written.
+
+  Parameters:
+  - frames: iterator of PIL images (e.g. loadFrames(fileNames))
+  - durations: list of the duration of each frame, in ms (e.g. frameDurations(nFrames))
+  - outName: the complete path and name of the video
+  - delay: duration of one video frame, in ms
+  """
+
+  for frame in videoFrames(frames, durations, [outName], delay):
+    pass
+
+  return os.path.isfile(outName)
+
+
+def animateFiles(fileNames, outName, delay=500, nDup=3, loop=0, optimize=False, formats=None, cached=False):
+  """
+  animateFiles(fileNames, outName, delay, nDup, loop, optimize, formats, cached)
+
+  Creates a .gif animation of the images, with the last one shown nDup frames longer, and/or videos of them (formats). The frames
+  are read once for all the formats. Returns True if the animation (or the first video, without .gif) was written (or did not need to be).
+
+  Parameters:
+  - fileNames: the complete paths and names of the frames, in order (a tuple of names for a frame that is joined from several images)
+  - outName: the complete path and name of the animation
+  - delay: duration of one frame, in ms
+  - nDup: number of frames the last frame is extended by
+  - loop: 0 means repeating
+  - optimize: if True, the frames share one palette (made from palette_samples of them), and only the part of each frame that changed is stored
+  - formats: the formats that are written, e.g. ['.gif', '.mp4'] (outName with these extensions); None is the format of outName
+  - cached: if True, the movie (and its videos) is not written again if its frames and settings are the same as when it was last written
+  """
+
+  root, extension = os.path.splitext(outName)
+  if formats is None:
+    formats = [extension]
+  durations = frameDurations(len(fileNames), delay, nDup)
+  videoNames = [root + ext for ext in formats if ext != '.gif']
+  if '.gif' not in formats and len(videoNames) == 0:
+    return False
+
+  outNames = videoNames
+  digest = None
+  if '.gif' in formats:
+    outNames = [root + '.gif'] + videoNames
+  if cached:
+    inputs = [fl for fileName in fileNames for fl in (fileName if isinstance(fileName, tuple) else (fileName,))]
+    digest = stageDigest(inputs, ([len(fileName) if isinstance(fileName, tuple) else 1 for fileName in fileNames], delay, nDup, loop, optimize, palette_samples, formats))
+    if isCurrent(outNames, digest):
+      print('      ... ' + os.path.basename(outName) + ' did not change.')
+      return True
+
+  if '.gif' not in formats:
+    for frame in videoFrames(loadFrames(fileNames), durations, videoNames, delay):
+      pass
+    written = os.path.isfile(videoNames[0])
+
+  else:
+    palette = None
+    if optimize and len(fileNames) > 0:
+      samples = sorted(set(round(num*(len(fileNames)-1)/max(1, palette_samples-1)) for num in range(palette_samples)))
+      palette = sharedPalette(loadFrames([fileNames[num] for num in samples]))
+
+    frames = loadFrames(fileNames)
+    if len(videoNames) > 0:
+      frames = videoFrames(frames, durations, videoNames, delay)
+
+    written = writeAnimation(frames, durations, root + '.gif', loop=loop, palette=palette)
+
+  if cached:
+    rememberOutputs(outNames, digest if written else None)
+
+  return written
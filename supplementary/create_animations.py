@@ -11,7 +11,7 @@ swu@ou.edu
 
 This program is used to retrieve images for the CPEX-AW and CPEX-CV field campaign forecasting template.
 
-Required packages: os, subprocess, time.
+Required packages: os, subprocess, animation_tools (in this directory, needs PIL), stage_cache.
 
 
 NOTE: Read through the True/False switches at the top of the script to make sure the ones you want are selected.
@@ -19,17 +19,25 @@ NOTE: Read through the True/False switches at the top of the script to make sure
 Updates:
  - 2022-08-20: Add ECWMF 700 & 850 mb outlook
  - 2022-08-27: Adopt to all operating systems
+ - 2026-10-18: Animations are written frame by frame with animation_tools (no convert call), and the last frame is shown longer instead of being copied nDup_frames times in ./figs/.
+ - 2026-10-18: The ECMWF animations read one frame at a time (animation_tools), instead of opening all of them (and the last one 3 more times) before writing.
+ - 2026-10-18: The script runs from main(switches, present_files), so run_forecast_scripts.py can import it and pass it the switches it already has.
+ - 2026-10-18: No more 10 s wait after reading the switches (the file is read completely by then).
+ - 2026-10-18: Switches that are not in switches (e.g. not passed on by run_forecast_scripts.py) are taken as False.
+ - 2026-10-18: Animations whose frames did not change since the last run are not written again (useStageCache, ./figs/.stage_cache.json).
 """
 
 
 import os
 import subprocess
-import time
-from PIL import Image
+
+from animation_tools import animateFiles, animationFiles
+from stage_cache import loadStageCache, saveStageCache
 
 
 readSwitches = True
 createAnimations = True
+useStageCache = True # do not write again the animations whose frames did not change since the last run (stage_cache.py)
 
 model_day1 = model_day2 = True
 
@@ -37,71 +45,22 @@ model_day1 = model_day2 = True
 
 
 
-nDup_frames = 3
+nDup_frames = 3 # number of frames the last frame of an animation is extended by
+animation_delay = 500 # ms each frame of an animation is shown
 
 forecastDir = os.getcwd()
 saveDir = os.path.join('.','figs')
 cropDir = os.path.join('.','figs_cropped')
 finDir  = os.path.join('.','figs_final')
-
-fl = open( os.path.join('.','supplementary','list_of_downloaded_files.txt'), 'r')
-wanted_files = fl.readlines()
-wanted_files = [line.rstrip() for line in wanted_files]
-fl.close()
-
-present_files = [fl for fl in os.listdir(saveDir)]
-present_files_animation = [fl for fl in present_files if '_anim_' in fl]
-
-
-def persistLastImage(fileDir, imageNameRoot, nDup=3):
-  """
-  persistLastImage(fileDir, imageNameRoot, nDup)
-
-  Will copy the last image in the series nDup times, so it persists a bit longer in animation.
-
-  Parameters:
-  - fileDir: the directory where the files are saved
-  - imageNameRoot: the complete root of the animation images (e.g. uwincm_anim_day1_)
-  - nDup: number of times the last image is duplicated
-  """
-
-  fls = sorted([el for el in os.listdir(fileDir) if imageNameRoot in el])
-  if len(fls) > 0:
-    working = True
-    frame_num = [int(el[-6:-4]) for el in fls]
-    for fl in range(nDup):
-      cmd = ['cp ', os.path.join(fileDir,imageNameRoot+'{:02d}'.format(frame_num[-1])+fls[-1][-4:]), os.path.join(fileDir,imageNameRoot+'{:02d}'.format(frame_num[-1]+fl+1)+fls[-1][-4:]) ]
-      os.system(' '.join(cmd))
-  else:
-    working = False
-
-  return working
-
-
-def createAnimation(fileDir, imageNameRoot, outName, delay=50, loop=0):
-  """
-  createAnimation(fileDir, imageNameRoot, delay=50, loop=0, outName)
-
-  Will create a .gif animation of the provided images and save it.
-
-  Parameters:
-  - fileDir: the directory where the files are saved
-  - imageNameRoot: the complete root of the animation images (e.g. uwincm_anim_day1_)
-  - outName: the name of the output file (e.g. something.gif)
-  - delay: delay in ms
-  - loop: 0 means repeating
-  """
-  cmd = ['convert ', '-delay', str(delay), os.path.join(fileDir,imageNameRoot+'*'), '-loop', str(loop), '+repage', os.path.join(fileDir,outName) ]
-  os.system(' '.join(cmd))
-
-  return
+stageCacheFile = os.path.join(saveDir,'.stage_cache.json')
 
 
 def animationSteps(fileDir, imageNameRoot, outName):
   """
   animationSteps(fileDir, imageNameRoot, outName)
 
-  Sequentially calls persistLastImage, then createAnimation (if possible), to output an animation.
+  Creates a .gif animation of the images (if there are any), with the last image shown nDup_frames frames longer.
+  The frames are read and written to the animation one at a time (animation_tools.animateFiles).
 
   Parameters:
   - fileDir: the directory where the files are saved
@@ -109,165 +68,195 @@ def animationSteps(fileDir, imageNameRoot, outName):
   - outName: the name of the output file (e.g. something.gif)
   """
 
-  dl = persistLastImage(fileDir, imageNameRoot)
+  fls = animationFiles(fileDir, imageNameRoot)
 
-  if dl:
-    createAnimation(fileDir, imageNameRoot, outName)
+  if len(fls) > 0:
+    animateFiles(fls, os.path.join(fileDir,outName), delay=animation_delay, nDup=nDup_frames, cached=useStageCache)
   else:
     print('... ... Missing images - cannot create animation')
 
   return
 
 
-if readSwitches:
-  print("Reading True/False switches from switches_process.txt")
-  fl = open( os.path.join(forecastDir,'supplementary','switches_process.txt'), 'r')
-  data = fl.readlines()
-  fl.close()
-  data = [line.rstrip() for line in data]
-
-  switches = {}
-  for line in data:
-    if len(line) > 0:
-      switch_name, switch_setting = line.split(' = ')
+def main(switches=None, present_files=None):
+  """
+  main(switches, present_files)
 
-      if switch_setting == 'True':
-        switches[switch_name] = True
-      elif switch_setting == 'False':
-        switches[switch_name] = False
+  Creates the animations of the downloaded model output (in ./figs/).
 
+  Parameters:
+  - switches: the True/False switches of switches_process.txt (None: read from the file); missing switches are False
+  - present_files: the names of the images in ./figs/ (None: listed)
+  """
 
-  print("Reading True/False switches complete.")
+  fl = open( os.path.join('.','supplementary','list_of_downloaded_files.txt'), 'r')
+  wanted_files = fl.readlines()
+  wanted_files = [line.rstrip() for line in wanted_files]
+  fl.close()
 
-  time.sleep(10)
-
-print('')
-print('')
-print('')
-print('')
-print('')
-
-
-if createAnimations:
-  print('Creating model output animations.')
+  if present_files is None:
+    present_files = [fl for fl in os.listdir(saveDir)]
+  present_files_animation = [fl for fl in present_files if '_anim_' in fl]
+
+
+  if readSwitches and switches is None:
+    print("Reading True/False switches from switches_process.txt")
+    fl = open( os.path.join(forecastDir,'supplementary','switches_process.txt'), 'r')
+    data = fl.readlines()
+    fl.close()
+    data = [line.rstrip() for line in data]
+
+    switches = {}
+    for line in data:
+      if len(line) > 0:
+        switch_name, switch_setting = line.split(' = ')
+
+        if switch_setting == 'True':
+          switches[switch_name] = True
+        elif switch_setting == 'False':
+          switches[switch_name] = False
 
 
-  if switches['uwincm_surfaceWind_animation']:
-    current_fls = [fl for fl in present_files_animation if 'uwincm_surfaceWind_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UWINCM surface winds - model day 1')
-        animationSteps(saveDir, 'uwincm_surfaceWind_day1_anim_', 'uwincm_surfaceWind_day1_movie.gif')
+    print("Reading True/False switches complete.")
+
+  print('')
+  print('')
+  print('')
+  print('')
+  print('')
+
+
+  if createAnimations:
+    if useStageCache:
+      loadStageCache(stageCacheFile)
+    print('Creating model output animations.')
+
 
-    current_fls = [fl for fl in present_files_animation if 'uwincm_surfaceWind_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UWINCM surface winds - model day 2')
-        animationSteps(saveDir, 'uwincm_surfaceWind_day2_anim_', 'uwincm_surfaceWind_day2_movie.gif')
-
-
-  if switches['uwincm_650mbRH_animation']:
-    current_fls = [fl for fl in present_files_animation if 'uwincm_650mbRH_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UWINCM 650mb moisture - model day 1')
-        animationSteps(saveDir, 'uwincm_650mbRH_day1_anim_', 'uwincm_650mbRH_day1_movie.gif')
+    if switches.get('uwincm_surfaceWind_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'uwincm_surfaceWind_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UWINCM surface winds - model day 1')
+          animationSteps(saveDir, 'uwincm_surfaceWind_day1_anim_', 'uwincm_surfaceWind_day1_movie.gif')
 
-    current_fls = [fl for fl in present_files_animation if 'uwincm_650mbRH_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UWINCM 650mb moisture - model day 2')
-        animationSteps(saveDir, 'uwincm_650mbRH_day2_anim_', 'uwincm_650mbRH_day2_movie.gif')
+      current_fls = [fl for fl in present_files_animation if 'uwincm_surfaceWind_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UWINCM surface winds - model day 2')
+          animationSteps(saveDir, 'uwincm_surfaceWind_day2_anim_', 'uwincm_surfaceWind_day2_movie.gif')
+
+
+    if switches.get('uwincm_650mbRH_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'uwincm_650mbRH_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UWINCM 650mb moisture - model day 1')
+          animationSteps(saveDir, 'uwincm_650mbRH_day1_anim_', 'uwincm_650mbRH_day1_movie.gif')
+
+      current_fls = [fl for fl in present_files_animation if 'uwincm_650mbRH_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UWINCM 650mb moisture - model day 2')
+          animationSteps(saveDir, 'uwincm_650mbRH_day2_anim_', 'uwincm_650mbRH_day2_movie.gif')
 
 
-  if switches['uwincm_clouds_animation']:
-    current_fls = [fl for fl in present_files_animation if 'uwincm_clouds_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UWINCM clouds - model day 1')
-        animationSteps(saveDir, 'uwincm_clouds_day1_anim_', 'uwincm_clouds_day1_movie.gif')
+    if switches.get('uwincm_clouds_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'uwincm_clouds_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UWINCM clouds - model day 1')
+          animationSteps(saveDir, 'uwincm_clouds_day1_anim_', 'uwincm_clouds_day1_movie.gif')
 
-    current_fls = [fl for fl in present_files_animation if 'uwincm_clouds_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UWINCM clouds - model day 2')
-        animationSteps(saveDir, 'uwincm_clouds_day2_anim_', 'uwincm_clouds_day2_movie.gif')
+      current_fls = [fl for fl in present_files_animation if 'uwincm_clouds_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UWINCM clouds - model day 2')
+          animationSteps(saveDir, 'uwincm_clouds_day2_anim_', 'uwincm_clouds_day2_movie.gif')
 
 
-  if switches['uwincm_precipitation_animation']:
-    current_fls = [fl for fl in present_files_animation if 'uwincm_precip_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UWINCM precipitation - model day 1')
-        animationSteps(saveDir, 'uwincm_precip_day1_anim_', 'uwincm_precip_day1_movie.gif')
+    if switches.get('uwincm_precipitation_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'uwincm_precip_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UWINCM precipitation - model day 1')
+          animationSteps(saveDir, 'uwincm_precip_day1_anim_', 'uwincm_precip_day1_movie.gif')
 
-    current_fls = [fl for fl in present_files_animation if 'uwincm_precip_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UWINCM precipitation - model day 2')
-        animationSteps(saveDir, 'uwincm_precip_day2_anim_', 'uwincm_precip_day2_movie.gif')
+      current_fls = [fl for fl in present_files_animation if 'uwincm_precip_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UWINCM precipitation - model day 2')
+          animationSteps(saveDir, 'uwincm_precip_day2_anim_', 'uwincm_precip_day2_movie.gif')
 
 
-  if switches['uwincm_boundaryLayer_animation']:
-    current_fls = [fl for fl in present_files_animation if 'uwincm_boundaryLayer_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UWINCM boundary layer - model day 1')
-        animationSteps(saveDir, 'uwincm_boundaryLayer_day1_anim_', 'uwincm_boundaryLayer_day1_movie.gif')
+    if switches.get('uwincm_boundaryLayer_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'uwincm_boundaryLayer_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UWINCM boundary layer - model day 1')
+          animationSteps(saveDir, 'uwincm_boundaryLayer_day1_anim_', 'uwincm_boundaryLayer_day1_movie.gif')
+
+      current_fls = [fl for fl in present_files_animation if 'uwincm_boundaryLayer_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UWINCM boundary layer - model day 2')
+          animationSteps(saveDir, 'uwincm_boundaryLayer_day2_anim_', 'uwincm_boundaryLayer_day2_movie.gif')
+
+
+    if switches.get('uutah_precipitation_animation', False) or switches.get('UTAH_website', False):
+      current_fls = [fl for fl in present_files_animation if 'uutah_precip_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UofUtah precipitation - model day 1')
+          animationSteps(saveDir, 'uutah_precip_day1_anim_', 'uutah_precip_day1_movie.gif')
 
-    current_fls = [fl for fl in present_files_animation if 'uwincm_boundaryLayer_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UWINCM boundary layer - model day 2')
-        animationSteps(saveDir, 'uwincm_boundaryLayer_day2_anim_', 'uwincm_boundaryLayer_day2_movie.gif')
+      current_fls = [fl for fl in present_files_animation if 'uutah_precip_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UofUtah precipitation - model day 2')
+          animationSteps(saveDir, 'uutah_precip_day2_anim_', 'uutah_precip_day2_movie.gif')
 
 
-  if switches['uutah_precipitation_animation'] or switches['UTAH_website']:
-    current_fls = [fl for fl in present_files_animation if 'uutah_precip_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UofUtah precipitation - model day 1')
-        animationSteps(saveDir, 'uutah_precip_day1_anim_', 'uutah_precip_day1_movie.gif')
+    if switches.get('ucdavis_precipitation_animation', False):
+      current_fls = [fl for fl in present_files_animation if 'ucdavis_precip_day1_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day1:
+          print('... UofDavis precipitation - model day 1')
+          animationSteps(saveDir, 'ucdavis_precip_day1_anim_', 'ucdavis_precip_day1_movie.gif')
+
+      current_fls = [fl for fl in present_files_animation if 'ucdavis_precip_day2_anim_' in fl]
+      if len(current_fls) == 12:
+        if model_day2:
+          print('... UofDavis precipitation - model day 2')
+          animationSteps(saveDir, 'ucdavis_precip_day2_anim_', 'ucdavis_precip_day2_movie.gif')
+
+
+
+    if switches.get('nasa_geos', False):
+      print('... NASA GEOS 700mb winds')
+      current_fls = [fl for fl in present_files_animation if 'GEOS_700mb_outlook_anim_' in fl]
+      if len(current_fls) == 7:
+        animationSteps(saveDir, 'GEOS_700mb_outlook_anim_', 'GEOS_700mb_outlook_movie.gif')
+
+
+    if switches.get('ECMWF_prediction', False):
+        var=['z700_vort','z850_vort']
+        for vv in var:
+            # each frame is read once, as it is written to the animation, and the last one is shown nDup_frames frames longer
+            fls = [os.path.join(saveDir,'ECMWF_'+vv+'_anim_day3_'+"{:02d}".format(num)+'.png') for num in range(0,24)]
+            if all(os.path.exists(fl) for fl in fls):
+                print('... ECMWF ' + vv)
+                animateFiles(fls, os.path.join(saveDir,'ECMWF_'+vv+'_day3.gif'), delay=animation_delay, nDup=nDup_frames, cached=useStageCache)
+            else:
+                print('... ... Missing ECMWF ' + vv + ' images - cannot create animation')
+
+
+
+    if useStageCache:
+      saveStageCache(stageCacheFile)
+    print('Creating model output animations complete.')
 
-    current_fls = [fl for fl in present_files_animation if 'uutah_precip_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UofUtah precipitation - model day 2')
-        animationSteps(saveDir, 'uutah_precip_day2_anim_', 'uutah_precip_day2_movie.gif')
+  return
 
 
-  if switches['ucdavis_precipitation_animation']:
-    current_fls = [fl for fl in present_files_animation if 'ucdavis_precip_day1_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day1:
-        print('... UofDavis precipitation - model day 1')
-        animationSteps(saveDir, 'ucdavis_precip_day1_anim_', 'ucdavis_precip_day1_movie.gif')
-
-    current_fls = [fl for fl in present_files_animation if 'ucdavis_precip_day2_anim_' in fl]
-    if len(current_fls) == 12:
-      if model_day2:
-        print('... UofDavis precipitation - model day 2')
-        animationSteps(saveDir, 'ucdavis_precip_day2_anim_', 'ucdavis_precip_day2_movie.gif')
-
-
-
-  if switches['nasa_geos']:
-    print('... NASA GEOS 700mb winds')
-    current_fls = [fl for fl in present_files_animation if 'GEOS_700mb_outlook_anim_' in fl]
-    if len(current_fls) == 7:
-      animationSteps(saveDir, 'GEOS_700mb_outlook_anim_', 'GEOS_700mb_outlook_movie.gif')
-
-
-  if switches['ECMWF_prediction']:
-      var=['z700_vort','z850_vort']
-      for vv in var:
-          images=[]
-          for num in range(0,24):
-              images.append(Image.open( os.path.join(saveDir,'ECMWF_'+vv+'_anim_day3_'+"{:02d}".format(num)+'.png') ))
-          for rep in range(3):
-              images.append(Image.open( os.path.join(saveDir,'ECMWF_'+vv+'_anim_day3_'+"{:02d}".format(num)+'.png') ))
-          images[0].save(os.path.join(saveDir,'ECMWF_'+vv+'_day3.gif'), save_all=True, append_images=images[1:], optimize=False, duration=500, loop=0)
-
-
-
-  print('Creating model output animations complete.')
+if __name__ == '__main__':
+  main()
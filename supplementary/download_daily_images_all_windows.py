@@ -11,7 +11,7 @@ swu@ou.edu
 
 This program is used to retrieve images for the CPEX-AW and CPEX-CV field campaign forecasting template.
 
-Required packages: datetime, numpy, os, subprocess, requests, bs4, urllib.
+Required packages: concurrent.futures, datetime, os, subprocess, requests, download_tools and product_catalog (in this directory).
 
 
 Updates:
@@ -27,25 +27,40 @@ Updates:
  - 2022-08-15: ECMWF 5 days outlook
  - 2022-08-26: Adopt to all operating systems
  - 2022-09-01: Askos dust download
+ - 2026-10-18: All images are collected as download jobs first and downloaded in parallel (download_tools.runDownloads), with a limit on the number of downloads per website. UWIN-CM precipitation is no longer skipped when the boundary layer switch is off.
+ - 2026-10-18: Images and GEOS pages are downloaded through a shared requests.Session that keeps connections to each website open (download_tools.openSession).
+ - 2026-10-18: Images that have not changed on the website since the last download are not downloaded again (useValidatorCache, ./figs/.download_cache.json).
+ - 2026-10-18: Missing mode (missingOnly, or 'missing' argument): only images that are absent or empty in ./figs/ are downloaded, GEOS pages are only read for those.
+ - 2026-10-18: The products and their urls moved to product_catalog.py, which returns the download jobs of all the products that are switched on (buildJobs).
+ - 2026-10-18: The GEOS pages are read at the same time (geos_page_workers), and their image urls are cached for the GEOS run (useGeosUrlCache, ./figs/.geos_url_cache.json).
+ - 2026-10-18: bs4/lxml are no longer needed (the GEOS pages are scanned with html.parser while they are downloaded).
+ - 2026-10-18: Downloads have connect/read timeouts and retries (download_connect_timeout, download_read_timeout, download_retries), and time budgets for each switch and for all downloads (download_group_budget, download_run_budget). Switches that run out of time are written as False to switches_process.txt.
+ - 2026-10-18: Images are saved to a temporary file, checked and renamed into ./figs/, so ./figs/ never has half-written images (and missing mode can trust the images that are there).
+ - 2026-10-18: The frames of each animation are checked with HEAD requests first, and an animation with a frame that is not on the website yet is not downloaded (probeAnimations).
+ - 2026-10-18: Each switch is written to switches_process.txt (and its images converted) as soon as all its images are downloaded (switchDone), so run_forecast_scripts.py can start cropping them while the other switches are downloading.
+ - 2026-10-18: The script runs from main(missing, on_switch_done), so run_forecast_scripts.py can import it and run it in its own python process (without starting a new one).
+ - 2026-10-18: switches_process.txt is written to the disk (sync_switches) as each switch is done, instead of waiting 10 s at the end of the script.
+ - 2026-10-18: changedSwitches asks the websites (HEAD) whether a switch has new images, and main(only=...) downloads only those switches, for the watch mode of run_forecast_scripts.py.
+ - 2026-10-18: Switches that are on but have no images to download are written as False to switches_process.txt (and passed on to on_switch_done) after the downloads.
 """
 
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import numpy as np
 import os
-import requests
 import subprocess
-import time
+import sys
 
-from bs4 import BeautifulSoup
-from urllib import request, error
-import ssl
-ssl._create_default_https_context = ssl._create_unverified_context
-#(ssl package is for ICAP aerosol downlaod)
+from download_tools import imagePresent, jobUrls, linkChanged, loadGeosUrlCache, loadValidatorCache, openSession, runDownloads, saveGeosUrlCache, saveValidatorCache, sync_switches, write_switch
+from product_catalog import ForecastDates, buildJobs, geosInitialTime
 
 
 readSwitches = True
 downloadImages = True
+useValidatorCache = True # only download images that changed on the website since the last download
+useGeosUrlCache = True # do not read the GEOS pages again if their image urls were already found for today's GEOS run
+probeAnimations = True # only download the frames of an animation if all of them are on the website (checked with HEAD requests)
+missingOnly = False # only download images that are not in ./figs/ yet (also set by running this script with the 'missing' argument)
 
 model_day1 = model_day2 = True
 
@@ -54,87 +69,56 @@ forecastDir = os.getcwd()
 saveDir = os.path.join('.','figs')
 cropDir = os.path.join('.','figs_cropped')
 finDir  = os.path.join('.','figs_final')
+validatorCacheFile = os.path.join(saveDir,'.download_cache.json')
+geosUrlCacheFile = os.path.join(saveDir,'.geos_url_cache.json')
 
 
 
-today = datetime.today()
-#today = datetime.strptime('2022-08-26', '%Y-%m-%d')
-today = today.replace(hour=0, minute=0, second=0, microsecond=0)
-today_m = today - timedelta(days=1)
-yesterday = today - timedelta(days=1)
-forecast_day1 = today + timedelta(days=1)
-forecast_day2 = today + timedelta(days=2)
 nFrames_uwincm = 12
 still_image_forecast_hr = 16
 dust_xLon = 15 # 15 degrees N
 dust_xLat = 20 # 20 degrees W
 nDup_frames = 3
-
-count_good_links = 0
-count_bad_links = 0
-
-pwd = os.getcwd()
-if 'supplementary' in pwd:
-  fl = open(os.path.join('.','list_of_downloaded_files.txt'), 'r')
-else:
-  fl = open(os.path.join(forecastDir,'supplementary','list_of_downloaded_files.txt'), 'r')
-wanted_files = fl.readlines()
-wanted_files = [line.rstrip() for line in wanted_files]
-fl.close()
-
-cmd = ['copy', os.path.join(forecastDir,'logo_cpexcv.png'), os.path.join(saveDir,'.')]
-os.system(' '.join(cmd))
-
-
-def downloadLink(imageUrl, imageName):
+download_workers = 8 # number of images downloaded at the same time
+download_per_host = 4 # number of images downloaded at the same time from a single website
+download_hosts = 12 # number of websites for which open connections are kept (for reuse)
+geos_page_workers = 4 # number of GEOS pages read at the same time
+download_connect_timeout = 10 # seconds to wait for a website to accept the connection
+download_read_timeout = 60 # seconds to wait for a website to send more data
+download_retries = 3 # number of times a download is tried again after a network error or a 429/5xx answer
+download_group_budget = 900 # seconds the downloads of one switch may take (None for no limit); a switch that runs out of time is set to False
+download_run_budget = 2400 # seconds all the downloads may take (None for no limit)
+
+
+def forecastDates():
   """
-  downloadLink (imageUrl, imageName)
+  forecastDates()
 
-  Will attempt to download the image located at imageUrl and save it at the provided imageName. If the image is not available, it will print out the message, and set a working variable to davis, to avoid further processing.
-
-  Parameters:
-  - imageUrl: the url of the image attempting to download (e.g. https:// ...)
-  - imageName: the complete path and name of the saved image (e.g. ./saveDir/imagename...)
-  - working: returned Boolean that will determine if further processing should be done
+  Returns the ForecastDates of today's forecast (the dates and settings the product urls depend on).
   """
-  try:
-    request.urlretrieve(imageUrl, imageName)
-    working = True
-  except error.HTTPError:
-    print('... ... Image currently not available.')
-    working = False
 
-  return working
+  today = datetime.today()
+  #today = datetime.strptime('2022-08-26', '%Y-%m-%d')
+  today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+  today_m = today - timedelta(days=1)
+  forecast_day1 = today + timedelta(days=1)
+  forecast_day2 = today + timedelta(days=2)
 
-def write_switch(switch_name, status, fl):
-  """
-  write_switch(switch_name, status, fl)
+  return ForecastDates(today=today, today_m=today_m, forecast_day1=forecast_day1, forecast_day2=forecast_day2, still_image_forecast_hr=still_image_forecast_hr,
+                       nFrames_uwincm=nFrames_uwincm, model_day1=model_day1, model_day2=model_day2, dust_xLon=dust_xLon, dust_xLat=dust_xLat)
 
-  Based on what files this script is able to download, it writes the True/False switches for the cropping script.
 
-  Parameters:
-  - switch_name: name of the switch (e.g. nhc_analysis)
-  - status: a list of true/false values on whether it was able to download
-  - fl: open file to write into.
+def downloadSwitches(switchFile='switches_download.txt'):
   """
+  downloadSwitches(switchFile)
 
-  if sum(status) > 0:
-    fl.write(switch_name + ' = True \n')
-  elif sum(status) == 0:
-    fl.write(switch_name + ' = False \n')
-
-
-  return
-
-
-
+  Returns the True/False switches of switches_download.txt (or of another switch file in ./supplementary/, e.g. switches_process.txt).
+  """
 
-if readSwitches:
-  print("Reading True/False switches from switches_download.txt")
-  if 'supplementary' in pwd:
-    fl = open(os.path.join('.','switches_download.txt'), 'r')
+  if 'supplementary' in os.getcwd():
+    fl = open(os.path.join('.',switchFile), 'r')
   else:
-    fl = open(os.path.join(forecastDir, 'supplementary','switches_download.txt'), 'r')
+    fl = open(os.path.join(forecastDir, 'supplementary',switchFile), 'r')
   data = fl.readlines()
   fl.close()
   data = [line.rstrip() for line in data]
@@ -149,74 +133,114 @@ if readSwitches:
       elif switch_setting == 'False':
         switches[switch_name] = False
 
-  if 'supplementary' in pwd:
-    fl_switch = open(os.path.join('.','switches_process.txt'), 'w')
-  else:
-    fl_switch = open(os.path.join(forecastDir, 'supplementary','switches_process.txt'), 'w')
-
+  return switches
 
-  print("Reading True/False switches complete.")
 
+def sourceKey(job):
+  """
+  sourceKey(job)
 
-print('')
-print('')
-print('')
-print('')
-print('')
+  Returns what an image of a DownloadJob is downloaded from: its (first) url, or the GEOS page its url is found on.
+  """
 
+  url = jobUrls(job)[0]
+  if callable(url):
+    return getattr(url, 'args', [repr(url)])[0]
 
+  return url
 
-if downloadImages:
-  print("Downloading images for today's forecast.")
 
-  # NHC Analysis and Tropical Weather Outlook
-  if switches['nhc_analysis']:
-    print('... Downloading NHC surface analysis.')
-    status = []
+def changedSwitches(check, refreshed):
+  """
+  changedSwitches(check, refreshed)
 
-    url = 'https://www.nhc.noaa.gov/tafb_latest/USA_latest.gif'
-    dl = downloadLink(url, os.path.join(saveDir,'NHC_surface_analysis.gif'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
+  Asks the websites of the switches in check whether they have published new images since the switches were last downloaded,
+  without downloading them: a HEAD request (linkChanged) for the last frame of each animation and for each still image.
+  A switch has changed if one of its images has, or if one of its urls (or GEOS pages) is new (e.g. a new model run, or a new day)
+  and the website cannot tell whether it changed. Urls that are not on the website yet do not count.
+  Returns a dictionary with the sources (sourceKey) of each switch that changed, to be passed back in refreshed once it is downloaded.
 
-    if dl:
-      print('    ... Converting .gif image to .png image.')
-      cmd = ['magick convert -coalesce ' + os.path.join(saveDir,'NHC_surface_analysis.gif') + ' ' + os.path.join(saveDir,'NHC_surface_analysis.png')]
-      os.system(cmd[0])
+  Parameters:
+  - check: the switches to check (e.g. the ones whose poll interval is up)
+  - refreshed: dictionary with the sources of each switch when it was last downloaded (a switch that is not in it has changed)
+  """
 
-    print('... Downloading NHC tropical weather 2-day outlook.')
+  switches = downloadSwitches()
+  jobs = buildJobs(switches, forecastDates(), saveDir, only=check, verbose=False)
+  if useValidatorCache:
+    loadValidatorCache(validatorCacheFile)
+
+  # the last frame of each animation is published last, the other frames are not asked for
+  last_frames = {}
+  for job in jobs:
+    if job.animation is None:
+      last_frames[job.imageName] = job
+    elif (job.switch, job.animation) not in last_frames or job.imageName > last_frames[(job.switch, job.animation)].imageName:
+      last_frames[(job.switch, job.animation)] = job
+  to_ask = [job for job in last_frames.values() if isinstance(jobUrls(job)[0], str)]
+
+  with ThreadPoolExecutor(max_workers=download_workers) as pool:
+    answers = dict(zip([job.imageName for job in to_ask],
+                       pool.map(lambda job: linkChanged(jobUrls(job)[0], job.imageName, timeout=(download_connect_timeout, download_read_timeout)), to_ask)))
+
+  changed = {}
+  for switch_name in check:
+    switch_jobs = [job for job in jobs if job.switch == switch_name]
+    if len(switch_jobs) == 0:
+      continue
+    sources = set(sourceKey(job) for job in switch_jobs)
+    if switch_name not in refreshed:
+      changed[switch_name] = sources
+      continue
+    for job in switch_jobs:
+      answer = answers.get(job.imageName, False if isinstance(jobUrls(job)[0], str) else None)
+      new = sourceKey(job) not in refreshed[switch_name]
+      if answer == True or (answer is None and new):
+        changed[switch_name] = sources
+        break
+
+  return changed
+
+
+def main(missing=None, on_switch_done=None, only=None):
+  """
+  main(missing, on_switch_done, only)
 
-    url = 'https://www.nhc.noaa.gov/xgtwo/two_atl_2d0.png'
-    dl = downloadLink(url, os.path.join(saveDir,'NHC_2day_outlook.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
+  Downloads the images of the switches that are True in switches_download.txt, and writes switches_process.txt.
+  Returns the switches written to switches_process.txt (True for the switches whose images were downloaded).
 
-    print('... Downloading NHC tropical weather 5-day outlook.')
+  Parameters:
+  - missing: if True, only the images that are not in ./figs/ yet are downloaded (None: missingOnly)
+  - on_switch_done: function(switch_name, switch_setting) called as soon as a switch is written to switches_process.txt (also for the switches that are off), or None
+  - only: the switches that are downloaded (e.g. the ones that changed on the website, changedSwitches), None for all of them.
+          switches_process.txt is written again in full: the other switches keep the settings they had in it.
+  """
 
-    url = 'https://www.nhc.noaa.gov/xgtwo/two_atl_5d0.png'
-    dl = downloadLink(url, os.path.join(saveDir,'NHC_5day_outlook.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
+  if missing is None:
+    missing = missingOnly
+  process_switches = {}
 
-    write_switch('nhc_analysis', status, fl_switch)
+  def switchDone(switch_name, switch_status):
+    """
+    switchDone(switch_name, switch_status)
 
-  # MIMIC-Total Precipitable Water
-  if switches['mimic_tpw']:
-    print('... Downloading MIMIC-TPW total precipitable water animation.')
-    status = []
+    Called by runDownloads as soon as all the images of a switch are downloaded: converts the images of the switch that need it,
+    writes the switch to switches_process.txt right away, and passes it on to on_switch_done (run_forecast_scripts.py starts cropping
+    the images of a switch then).
 
-    url = 'http://tropic.ssec.wisc.edu/real-time/mtpw2/webAnims/tpw_nrl_colors/natl/mimictpw_natl_latest.gif'
-    dl = downloadLink(url, os.path.join(saveDir,'MIMIC-TPW_24h_animation.gif'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
+    Parameters:
+    - switch_name: name of the switch (e.g. nhc_analysis)
+    - switch_status: list of true/false values on whether its images were downloaded
+    """
 
-    print('    ... Converting .gif animation to .png sequence of images.')
+    # in missing mode, only if the converted image is missing
+    if switch_name == 'nhc_analysis' and switch_status[0] and not (missing and imagePresent(os.path.join(saveDir,'NHC_surface_analysis.png'))):
+      print('... Converting NHC surface analysis .gif image to .png image.')
+      cmd = ['magick convert -coalesce ' + os.path.join(saveDir,'NHC_surface_analysis.gif') + ' ' + os.path.join(saveDir,'NHC_surface_analysis.png')]
+      os.system(cmd[0])
 
-    if dl:
+    if switch_name == 'mimic_tpw' and switch_status[0] and not (missing and imagePresent(os.path.join(saveDir,'MIMIC-TPW_latest.png'))):
+      print('... Converting MIMIC-TPW .gif animation to .png sequence of images.')
       cmd = ['magick convert -coalesce ' + os.path.join(saveDir,'MIMIC-TPW_24h_animation.gif') + ' ' + os.path.join(saveDir,'MIMIC-TPW_24h_animation.png')]
       os.system(cmd[0])
 
@@ -228,687 +252,118 @@ if downloadImages:
       cmd = ['copy', os.path.join(saveDir,latest_frame), os.path.join(saveDir,'MIMIC-TPW_latest.png')]
       os.system(' '.join(cmd))
 
-    write_switch('mimic_tpw', status, fl_switch)
-
-  # GOES-16 satellite imagery - Bedka group
-  if switches['GOES16_sat']:
-    print('... Downloading GOES16 visible satellite imagery.')
-    status = []
-
-    url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/g16/latest/G16.LATEST.01KM.HVIS.PNG'
-    dl = downloadLink(url, os.path.join(saveDir,'Goes16_VIS.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    print('... Downloading GOES16 RGB satellite imagery.')
-    url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/g16/latest/G16.LATEST.02KM.RGB.PNG'
-    dl = downloadLink(url, os.path.join(saveDir,'Goes16_RGB.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    print('... Downloading GOES16 IRC satellite imagery.')
-    url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/g16/latest/G16.LATEST.02KM.IRC.PNG'
-    dl = downloadLink(url, os.path.join(saveDir,'Goes16_IRC.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    write_switch('GOES16_sat', status, fl_switch)
-
-  # METEOSAT-11 satellite imagery - Bedka group
-  if switches['meteosat_sat']:
-    print('... Downloading Meteosat-11 visible satellite imagery.')
-    status = []
-
-    url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/met/latest/M11.LATEST.03KM.VIS.PNG'
-    dl = downloadLink(url, os.path.join(saveDir,'Meteosat11_VIS.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    print('... Downloading Meteosat-11 IRC satellite imagery.')
-    url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/met/latest/M11.LATEST.03KM.IRC.PNG'
-    dl = downloadLink(url, os.path.join(saveDir,'Meteosat11_IRC.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-
-    write_switch('meteosat_sat', status, fl_switch)
-
-  # Alan Brammer's tropical wave tracking
-  if switches['brammer_tropical_waves']:
-    print("... Downloading AEW analysis from Alan Brammer's Website")
-    status = []
-
-    init_date = datetime.strptime('2013-01-01', '%Y-%m-%d')
-    time_diff = int(np.ceil((today-init_date).total_seconds()/3600))
-
-
-    url = 'http://www.atmos.albany.edu/student/abrammer/graphics/gfs_realtime/plots/prate_sf_mslp/ea_prate_sf_mslp_' + str(time_diff) + '.0.jpg'
-    dl = downloadLink(url, os.path.join(saveDir,'AEW_Brammer.jpg'))
-    if not dl:
-      time_diff += 6
-      url = 'http://www.atmos.albany.edu/student/abrammer/graphics/gfs_realtime/plots/prate_sf_mslp/ea_prate_sf_mslp_' + str(time_diff) + '.0.jpg'
-      print('    ... Trying a different time.')
-      dl = downloadLink(url, os.path.join(saveDir,'AEW_Brammer.jpg'))
-
-
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    write_switch('brammer_tropical_waves', status, fl_switch)
-
-  # Saharan Air Layer - Split Window GOES-16
-  if switches['sal_split']:
-    print("... Downloading dry air and dust image from CIMSS (split window).")
-    status = []
-
-    url = 'http://tropic.ssec.wisc.edu/real-time/sal/g16split/g16split.jpg'
-    dl = downloadLink(url, os.path.join(saveDir,'SAL_dryAir_split.jpg'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    write_switch('sal_split', status, fl_switch)
-
-
-  # # # MODEL STUFF NOW - SINGLE IMAGES
-  if switches['uwincm_clouds_current']:
-    print("... Downloading UWINCM cloud maps at forecast making time (08Z on current day).")
-    status = []
-    url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + (yesterday- timedelta(days=1)).strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' +  today.strftime('%Y%m%d') + '10.jpg'
-    dl = downloadLink(url, os.path.join(saveDir,'uwincm_clouds_current.jpg'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    write_switch('uwincm_clouds_current', status, fl_switch)
-
-  if switches['uwincm_surfaceWind']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM surface wind map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/windsfc/wspd.large.' +  forecast_day1.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_surfaceWind_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM surface wind map - single -  for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/windsfc/wspd.large.' +  forecast_day2.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_surfaceWind_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-
-    write_switch('uwincm_surfaceWind', status, fl_switch)
-
-  if switches['uwincm_650mbRH']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM 650mb moisture map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/rh650mb/650mb_rh.large.' +  forecast_day1.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_650mbRH_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM 650mb moisture map - single - for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/rh650mb/650mb_rh.large.' +  forecast_day2.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_650mbRH_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    write_switch('uwincm_650mbRH', status, fl_switch)
-
-  if switches['uwincm_clouds']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM cloud map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' +  forecast_day1.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_clouds_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM cloud map - single - for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' +  forecast_day2.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_clouds_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    write_switch('uwincm_clouds', status, fl_switch)
-
-  if switches['uwincm_precipitation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM precipitation map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/rr_slp/rainr.storm.' +  forecast_day1.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_precip_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM precipitation map - single - for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/rr_slp/rainr.storm.' +  forecast_day2.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_precip_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    write_switch('uwincm_precipitation', status, fl_switch)
-
-  if switches['uwincm_boundaryLayer']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM boundary layer map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/blh/blh.storm.' +  forecast_day1.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_boundaryLayer_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM boundary layer map - single - for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/blh/blh.storm.' +  forecast_day2.strftime('%Y%m%d') + '{:02d}'.format(still_image_forecast_hr) + '.jpg'
-      dl = downloadLink(url, os.path.join(saveDir,'uwincm_boundaryLayer_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    write_switch('uwincm_boundaryLayer', status, fl_switch)
-
-  if switches['uutah_precipitation']:
-    status = []
-    if model_day1:
-      print("... Downloading UofUtah model precipitation map - single - for model day 1.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/uutah/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' +  forecast_day1.strftime('%Y-%m-%d') + '_' + '{:02d}'.format(still_image_forecast_hr) + ':00:00_d02.png'
-      dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day1.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    if model_day2:
-      print("... Downloading UofUtah model precipitation map - single - for model day 2.")
-      url = 'https://orca.atmos.washington.edu/model_images/atl/uutah/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' +  forecast_day2.strftime('%Y-%m-%d') + '_' + '{:02d}'.format(still_image_forecast_hr) + ':00:00_d02.png'
-      dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day2.jpg'))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    write_switch('uutah_precipitation', status, fl_switch)
-
-
-  # # # MODEL STUFF NOW - ANIMATIONS
-  if switches['uwincm_surfaceWind_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM surface wind map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/windsfc/wspd.large.' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_surfaceWind_day1_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM surface wind map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/windsfc/wspd.large.' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_surfaceWind_day2_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uwincm_surfaceWind_animation', status, fl_switch)
-
-
-  if switches['uwincm_650mbRH_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM 650mb moisture map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/rh650mb/650mb_rh.large.' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_650mbRH_day1_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM 650mb moisture map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/large/rh650mb/650mb_rh.large.' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_650mbRH_day2_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uwincm_650mbRH_animation', status, fl_switch)
-
-
-  if switches['uwincm_clouds_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM cloud map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_clouds_day1_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM cloud map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_clouds_day2_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uwincm_clouds_animation', status, fl_switch)
-
-
-  if switches['uwincm_precipitation_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM precipitation map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/rr_slp/rainr.storm.' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_precip_day1_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM precipitation map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/rr_slp/rainr.storm.' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_precip_day2_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uwincm_precipitation_animation', status, fl_switch)
-
-
-  if switches['uwincm_boundaryLayer_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UWINCM boundary layer map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/blh/blh.storm.' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_boundaryLayer_day1_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UWINCM boundary layer map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/umcm_wmh/realtime/' + today_m.strftime('%Y%m%d') + '00/ecmwf/storm/blh/blh.storm.' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y%m%d%H') + '.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'uwincm_boundaryLayer_day2_anim_' + '{:02d}'.format(frame) + '.jpg'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uwincm_boundaryLayer_animation', status, fl_switch)
-
-
-  if switches['uutah_precipitation_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UofUtah model precipitation map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/uutah/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' +  (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y-%m-%d_%H:%M:%S') + '_d02.png'
-        dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day1_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UofUtah model precipitation map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/uutah/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' +  (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y-%m-%d_%H:%M:%S') + '_d02.png'
-        dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day2_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('uutah_precipitation_animation', status, fl_switch)
-
-
-  if switches['ucdavis_precipitation_animation']:
-    status = []
-    if model_day1:
-      print("... Downloading UofDavis model precipitation map - animation - for model day 1.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/ucdavis/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/SLP_Rainrate_' +  today_m.strftime('%Y%m%d') +'12_fcst_'+"{:02d}".format(frame*2+36+1)+'hr.d02.png'
-        dl = downloadLink(url, os.path.join(saveDir,'ucdavis_precip_day1_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    if model_day2:
-      print("... Downloading UofDavis model precipitation map - animation - for model day 2.")
-      for frame in range(nFrames_uwincm):
-        url = 'https://orca.atmos.washington.edu/model_images/atl/ucdavis/realtime/' + today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/SLP_Rainrate_' +  today_m.strftime('%Y%m%d') +'12_fcst_'+"{:02d}".format(frame*2+60+1)+'hr.d02.png'
-        dl = downloadLink(url, os.path.join(saveDir,'ucdavis_precip_day2_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('ucdavis_precipitation_animation', status, fl_switch)
-
-
-  if switches['UTAH_website']:
-      print("... Downloading UofUtah model precipitation map from UTAH website.")
-      status = []
-      vv = 'slp_rain'
-      dd = 'd02'
-      for frame in range(12):
-        url = 'https://home.chpc.utah.edu/~pu/cpexaw/png/' + today_m.strftime('%Y-%m-%d') + '_00/' + vv + '-' + (forecast_day1+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y-%m-%d_%H:%M:%S') + '_'+dd+'.png'
-        dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day1_anim_' + '{:02d}'.format(frame) + '.png'))
-        url = 'https://home.chpc.utah.edu/~pu/cpexaw/png/' + today_m.strftime('%Y-%m-%d') + '_00/' + vv + '-' + (forecast_day2+timedelta(hours=1) + timedelta(hours=2*frame)).strftime('%Y-%m-%d_%H:%M:%S') + '_'+dd+'.png'
-        dl = downloadLink(url, os.path.join(saveDir,'uutah_precip_day2_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-      write_switch('UTAH_website', status, fl_switch)
-
-
-  if switches['mpas_outlook']:
-    vv=['pw_olr','rainr']
-    status = []
-    for var in vv:
-      print("... Downloading MPAS model " + var + " map.")
-      for frame in range(12): #57
-        url = 'https://www2.mmm.ucar.edu/projects/real-time-forecasts/img/' + today_m.strftime('%Y%m%d') + '12/UW/cpex_aw.' + var + '.westafrica.init' + today_m.strftime('%Y%m%d') + '12.fcst' + "{:03d}".format(frame*2+84+1) + 'hr.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'mpas_' + var + '_day3_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-      for frame in range(6):
-        url = 'https://www2.mmm.ucar.edu/projects/real-time-forecasts/img/' + today_m.strftime('%Y%m%d') + '12/UW/cpex_aw.' + var + '.westafrica.init' + today_m.strftime('%Y%m%d') + '12.fcst' + "{:03d}".format(frame*2+108+1) + 'hr.jpg'
-        dl = downloadLink(url, os.path.join(saveDir,'mpas_' + var + '_day4_anim_' + '{:02d}'.format(frame) + '.png'))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-    write_switch('mpas_outlook', status, fl_switch)
-
-  # NOW BACK TO OBSERVATIONS - ICAP
-  if switches['icap_aerosol_ensemble']:
-    print("... Downloading ICAP AOT ensemble mean maps for day 3.")
-    status = []
-
-    url_base = 'https://www.nrlmry.navy.mil/aerosol/globaer/icap_01/subtropatl/' + (today-timedelta(days=1)).strftime('%Y%m%d') + '00/' + (today-timedelta(days=1)).strftime('%Y%m%d') + '00_'
-    days = [4, 5]
-    download_days = [((today-timedelta(days=1)) + timedelta(days=dy)).strftime('%Y%m%d%H') for dy in days]
-
-    dTime = int((datetime.strptime(download_days[0], '%Y%m%d%H') - (today-timedelta(days=1))).total_seconds()/3600)
-    url = url_base + download_days[0] + '_f' + '{:03d}'.format(dTime) + '_total_aod_550_subtropatl_icap.png'
-
-    dl = downloadLink(url, os.path.join(saveDir,'ICAP_aerosol_ensemble_' + str(dTime) + '.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-
-    print("... Downloading ICAP AOT ensemble mean maps for day 5.")
-    dTime = int((datetime.strptime(download_days[1], '%Y%m%d%H') - (today-timedelta(days=1))).total_seconds()/3600)
-    url = url_base + download_days[1] + '_f' + '{:03d}'.format(dTime) + '_total_aod_550_subtropatl_icap.png'
-
-    dl = downloadLink(url, os.path.join(saveDir,'ICAP_aerosol_ensemble_' + str(dTime) + '.png'))
-    count_good_links += dl
-    count_bad_links += (1 - dl)
-    status.append(dl)
-
-    write_switch('icap_aerosol_ensemble', status, fl_switch)
-
-
-
-  if switches['ECMWF_prediction']:
-    ECMWF_files=[]
-    for num in range(24): #57
-      ECMWF_files.append('anim_day3_'+"{:02d}".format(num)+'.png')
-
-    var = ['z700_vort','z850_vort']#,'mslp_pcpn']
-    for vv in var:
-      print('... Downloading ECMWF from tropical tidbits-',vv)
-      for idx, tau in enumerate(ECMWF_files):
-        status = []
-    # -----  00Z initialization simulations
-        url_base = 'https://www.tropicaltidbits.com/analysis/models/ecmwf/' + (today).strftime('%Y%m%d')+'00/ecmwf_'
-
-        if vv == 'mslp_pcpn':
-            if idx > 0: dl = downloadLink(url_base+vv+'_atl_'+str(idx)+'.png', os.path.join(saveDir,'ECMWF_'+vv+'_'+ECMWF_files[idx]))
-        else:
-            dl = downloadLink(url_base+vv+'_nafr_'+str(idx+1+24)+'.png', os.path.join(saveDir,'ECMWF_'+vv+'_'+ECMWF_files[idx]))
-
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-    write_switch('ECMWF_prediction', status, fl_switch)
-
-
-
-
-  # NASA geos dust simulations
-  if switches['nasa_geos']:
-    fInitialTime = today_m.strftime('%Y%m%d') + 'T120000'
-    img_url_pattern = '/missions/static//plots/'
-    req_timeout = 300 #seconds
-
-    #=== Aerosol optical thickness config
-    AOT_tau = ['012', '036', '060'] #Change tau to choose different lead hour
-    AOT_tau_TOD = ['012', '036', '060','084', '108']
-
-    AOT_url_prefix = 'https://fluid.nccs.nasa.gov/missions/chem2d_mission%2BPRDUST/?one_click=1&'
-    AOT_url_suffix = '&stream=G5FPFC&level=0&region=prdust&fcst=' + fInitialTime
-
-    AOT_img_2D_files = ['GEOS_dust_aot.png',
-                        'GEOS_dust_aot_day1.png',
-                        'GEOS_dust_aot_day2.png']
-
-    AOT_img_total_files = ['GEOS_total_aot.png',
-                           'GEOS_total_aot_day1.png',
-                           'GEOS_total_aot_day2.png',
-                           'GEOS_total_aot_day3.png',
-                           'GEOS_total_aot_day4.png']
-
-    AOT_img_lowcf_files = ['GEOS_lowCloudFraction.png',
-                           'GEOS_lowCloudFraction_day1.png',
-                           'GEOS_lowCloudFraction_day2.png']
-
-    AOT_img_midcf_files = ['GEOS_midCloudFraction.png',
-                           'GEOS_midCloudFraction_day1.png',
-                           'GEOS_midCloudFraction_day2.png']
-
-    AOT_img_highcf_files = ['GEOS_highCloudFraction.png',
-                            'GEOS_highCloudFraction_day1.png',
-                            'GEOS_highCloudFraction_day2.png']
-
-    #lon cross section
-    AOT_img_loncs_files = ['GEOS_dust_aot_vert_' + str(dust_xLon) + 'N.png',
-                           'GEOS_dust_aot_day1_vert_' + str(dust_xLon) + 'N.png',
-                           'GEOS_dust_aot_day2_vert_' + str(dust_xLon) + 'N.png']
-
-    #lat cross section
-    AOT_img_latcs_files = ['GEOS_dust_aot_vert_' + str(dust_xLat) + 'W.png',
-                           'GEOS_dust_aot_day1_vert_' + str(dust_xLat) + 'W.png',
-                           'GEOS_dust_aot_day2_vert_' + str(dust_xLat) + 'W.png']
-
-    #=== 700mb wind & geopotential height config
-    #wind_700mb_tau = ['072', '078', '084', '090', '096', '102', '108', '114', '120', '126', '132', '138']
-    wind_700mb_tau = ['084', '090', '096', '102', '108', '114', '120']
+    write_switch(switch_name, switch_status, fl_switch)
+    sync_switches(fl_switch)
+    process_switches[switch_name] = sum(switch_status) > 0
+    if on_switch_done is not None:
+      on_switch_done(switch_name, process_switches[switch_name])
 
-    wind_700mb_files = ['GEOS_700mb_outlook_anim_00.png',
-                        'GEOS_700mb_outlook_anim_01.png',
-                        'GEOS_700mb_outlook_anim_02.png',
-                        'GEOS_700mb_outlook_anim_03.png',
-                        'GEOS_700mb_outlook_anim_04.png',
-                        'GEOS_700mb_outlook_anim_05.png',
-                        'GEOS_700mb_outlook_anim_06.png']
+    return
 
 
-    def find_geos_img_url(webpage,text_pattern,timeout):
-
-      geos_domain = 'https://fluid.nccs.nasa.gov'
-      response = request.urlopen(webpage,None,timeout)
-      data = response.read()
-      content = data.decode('utf8')
-      parsedPage = BeautifulSoup(content,features='lxml')
-
-      imgElms = parsedPage.findAll('img')
-
-      img_url = -1
-      for img in imgElms:
-        result = str.find(img.attrs['src'],text_pattern)
-        if result == 0:
-          img_url = geos_domain + img.attrs['src']
-          break
-        elif result > 0:
-          img_url  = img.attrs['src']
-          break
-
-      return img_url
-
-    #Get AOT 2D image (dust only)
-    print("... Downloading images from GEOS - Aerosol Opt. Thickness - Dust.")
-    status = []
-
-    for idx, tau in enumerate(AOT_tau):
-      AOT_page = AOT_url_prefix + 'tau=' + tau + AOT_url_suffix + '&field=duaot'
-      AOT_img_url = find_geos_img_url(AOT_page, img_url_pattern, req_timeout)
-
-      dl = downloadLink(AOT_img_url, os.path.join(saveDir,AOT_img_2D_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    #Get AOT total image
-    print("... Downloading images from GEOS - Aerosol Opt. Thickness - Total.")
-
-    for idx, tau in enumerate(AOT_tau_TOD):
-      AOT_page = AOT_url_prefix + 'tau=' + tau + AOT_url_suffix + '&field=totaot'
-      AOT_img_url = find_geos_img_url(AOT_page, img_url_pattern, req_timeout)
-
-      dl = downloadLink(AOT_img_url, os.path.join(saveDir,AOT_img_total_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-
-    print("... Downloading images from GEOS - Low cloud fraction.")
-
-    for idx, tau in enumerate(AOT_tau):
-      cldfra_prefix = AOT_url_prefix.replace('chem2d_mission', 'weather_mission')
-      cldfra_suffix = AOT_url_suffix
-      cldfra_page = cldfra_prefix + 'tau=' + tau + cldfra_suffix + '&field=cldlow'
-      cldfra_img_url = find_geos_img_url(cldfra_page, img_url_pattern, req_timeout)
-
-
-      dl = downloadLink(cldfra_img_url, os.path.join(saveDir,AOT_img_lowcf_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    print("... Downloading images from GEOS - Middle cloud fraction.")
-
-    for idx, tau in enumerate(AOT_tau):
-      cldfra_prefix = AOT_url_prefix.replace('chem2d_mission', 'weather_mission')
-      cldfra_suffix = AOT_url_suffix
-      cldfra_page = cldfra_prefix + 'tau=' + tau + cldfra_suffix + '&field=cldmid'
-      cldfra_img_url = find_geos_img_url(cldfra_page, img_url_pattern, req_timeout)
-
-
-      dl = downloadLink(cldfra_img_url, os.path.join(saveDir,AOT_img_midcf_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-    print("... Downloading images from GEOS - High cloud fraction.")
-
-    for idx, tau in enumerate(AOT_tau):
-      cldfra_prefix = AOT_url_prefix.replace('chem2d_mission', 'weather_mission')
-      cldfra_suffix = AOT_url_suffix
-      cldfra_page = cldfra_prefix + 'tau=' + tau + cldfra_suffix + '&field=cldhgh'
-      cldfra_img_url = find_geos_img_url(cldfra_page, img_url_pattern, req_timeout)
-
-
-      dl = downloadLink(cldfra_img_url, os.path.join(saveDir,AOT_img_highcf_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
-
-
-
-    #Get AOT longitudinal cross section
-    if switches['nasa_geos_cross_section']:
-      print("... Downloading images from GEOS - Aerosol Opt. Thickness - Lon Cross section.")
-      for idx, tau in enumerate(AOT_tau):
-        AOT_page = AOT_url_prefix.replace('chem2d_mission', 'custom_mission')
-        AOT_page =  AOT_page + 'tau=' + tau + AOT_url_suffix + '&field=du_w2'
-        AOT_img_url = find_geos_img_url(AOT_page, img_url_pattern, req_timeout)
-
-        dl = downloadLink(AOT_img_url, os.path.join(saveDir,AOT_img_loncs_files[idx]))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-      #Get AOT latitudinal cross section image
-      print("... Downloading images from GEOS - Aerosol Opt. Thickness - Lat Cross section.")
-      for idx, tau in enumerate(AOT_tau):
-        AOT_page = AOT_url_prefix.replace('chem2d_mission', 'custom_mission')
-        AOT_page =  AOT_page + 'tau=' + tau + AOT_url_suffix + '&field=du_n1'
-        AOT_img_url = find_geos_img_url(AOT_page, img_url_pattern, req_timeout)
-
-        dl = downloadLink(AOT_img_url, os.path.join(saveDir,AOT_img_latcs_files[idx]))
-        count_good_links += dl
-        count_bad_links += (1 - dl)
-        status.append(dl)
-
-
-    #Get 700 mb wind with geopotential heights
-    print("... Downloading images from GEOS - 700 mb wind and Geopotential heights.")
-    for idx, tau in enumerate(wind_700mb_tau):
-      wind700mb_prefix = AOT_url_prefix.replace('chem2d_mission', 'weather_mission')
-      wind700mb_suffix = AOT_url_suffix.replace('level=0','level=700')
-      wind700mb_page = wind700mb_prefix + 'tau=' + tau + wind700mb_suffix + '&field=wspd'
-      wind700m_img_url = find_geos_img_url(wind700mb_page, img_url_pattern, req_timeout)
+  pwd = os.getcwd()
+  if 'supplementary' in pwd:
+    fl = open(os.path.join('.','list_of_downloaded_files.txt'), 'r')
+  else:
+    fl = open(os.path.join(forecastDir,'supplementary','list_of_downloaded_files.txt'), 'r')
+  wanted_files = fl.readlines()
+  wanted_files = [line.rstrip() for line in wanted_files]
+  fl.close()
 
-      dl = downloadLink(wind700m_img_url, os.path.join(saveDir,wind_700mb_files[idx]))
-      count_good_links += dl
-      count_bad_links += (1 - dl)
-      status.append(dl)
+  cmd = ['copy', os.path.join(forecastDir,'logo_cpexcv.png'), os.path.join(saveDir,'.')]
+  os.system(' '.join(cmd))
 
 
-    write_switch('nasa_geos', status, fl_switch)
+  # with only, the switches that are not downloaded again keep the settings they had in switches_process.txt
+  previous = {}
+  if only is not None:
+    try:
+      previous = downloadSwitches('switches_process.txt')
+    except OSError:
+      pass
 
+  if readSwitches:
+    print("Reading True/False switches from switches_download.txt")
+    switches = downloadSwitches()
+    print("Reading True/False switches complete.")
 
-  #Write False to switches_process.txt
-  for s_dl in switches:
-      if switches[s_dl] == False:
-         write_switch(s_dl, '', fl_switch)
+  if 'supplementary' in pwd:
+    fl_switch = open(os.path.join('.','switches_process.txt'), 'w')
+  else:
+    fl_switch = open(os.path.join(forecastDir, 'supplementary','switches_process.txt'), 'w')
 
 
-  total_links = count_good_links + count_bad_links
-  print("Downloading images for today's forecast complete.")
-  print("There were a total of " + str(count_good_links) + "/" + str(total_links) + " good links (" + '{:.1f}'.format((count_good_links/total_links)*100) + '%).')
+  print('')
+  print('')
+  print('')
+  print('')
+  print('')
+
+
+
+  if downloadImages:
+    print("Downloading images for today's forecast.")
+
+    dates = forecastDates()
+
+    # all the products and their urls are in product_catalog.py
+    # (the GEOS image urls are found on the GEOS pages when the images are downloaded, and not at all for images that are already present in missing mode)
+    jobs = buildJobs(switches, dates, saveDir, only)
+
+
+    #Write the switches that are not downloaded again (with only) and False to switches_process.txt (first, the other switches are written as their downloads are done)
+    for s_dl in previous:
+        if s_dl not in only:
+           write_switch(s_dl, [previous[s_dl]], fl_switch)
+           process_switches[s_dl] = previous[s_dl]
+           if on_switch_done is not None:
+             on_switch_done(s_dl, previous[s_dl])
+    for s_dl in switches:
+        if switches[s_dl] == False and (only is None or s_dl in only or s_dl not in previous):
+           write_switch(s_dl, '', fl_switch)
+           process_switches[s_dl] = False
+           if on_switch_done is not None:
+             on_switch_done(s_dl, False)
+    sync_switches(fl_switch)
+
+
+    print('')
+    if missing:
+      print("Downloading MISSING images out of " + str(len(jobs)) + " images (" + str(download_workers) + " at a time).")
+    else:
+      print("Downloading " + str(len(jobs)) + " images (" + str(download_workers) + " at a time).")
+    openSession(pool_connections=download_hosts, pool_maxsize=download_per_host)
+    if useValidatorCache:
+      loadValidatorCache(validatorCacheFile)
+    if useGeosUrlCache:
+      loadGeosUrlCache(geosUrlCacheFile, geosInitialTime(dates))
+    count_good_links, count_bad_links, status = runDownloads(jobs, max_workers=download_workers, max_per_host=download_per_host, missing_only=missing,
+                                                             max_resolvers=geos_page_workers, timeout=(download_connect_timeout, download_read_timeout),
+                                                             retries=download_retries, group_budget=download_group_budget, run_budget=download_run_budget,
+                                                             probe=probeAnimations, on_switch_done=switchDone)
+    if useValidatorCache:
+      saveValidatorCache(validatorCacheFile)
+    if useGeosUrlCache:
+      saveGeosUrlCache(geosUrlCacheFile)
+
+    # switches that are on but had no images to download (e.g. none of their products for these dates) are written as False
+    for s_dl in switches:
+        if s_dl not in process_switches:
+           write_switch(s_dl, '', fl_switch)
+           process_switches[s_dl] = False
+           if on_switch_done is not None:
+             on_switch_done(s_dl, False)
+    sync_switches(fl_switch)
+
+
+    total_links = count_good_links + count_bad_links
+    print("Downloading images for today's forecast complete.")
+    if total_links > 0:
+      print("There were a total of " + str(count_good_links) + "/" + str(total_links) + " good links (" + '{:.1f}'.format((count_good_links/total_links)*100) + '%).')
   fl_switch.close()
 
+  return process_switches
+
 
-  time.sleep(10)
+if __name__ == '__main__':
+  main(True if 'missing' in sys.argv[1:] else None)
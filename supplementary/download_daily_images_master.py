@@ -10,15 +10,20 @@ It will download ALL files if:
  - there is only the logo file in ./figs (everything is missing).
  - all the files are present in ./figs (update all images).
 
-Otherwise, it will only download the missing files.
+Otherwise, it will only download the missing files (absent or empty files in ./figs). Which url and switch each missing file belongs to is
+known by download_daily_images_all.py, which is run in its missing mode.
 
+The choice can be forced by running this script with the 'all' or 'missing' argument.
 
-Required packages: os.
 
+Required packages: os, sys.
 
 
+Updates:
+ - 2026-10-18: The missing-only download is done by download_daily_images_all.py with the 'missing' argument; empty files count as missing.
 """
 import os
+import sys
 
 forecastDir = './'
 saveDir = './figs/'
@@ -32,17 +37,23 @@ wanted_files = fl.readlines()
 wanted_files = [line.rstrip() for line in wanted_files]
 fl.close()
 
-present_files = [fl for fl in os.listdir(saveDir) if fl in wanted_files]
+present_files = [fl for fl in os.listdir(saveDir) if fl in wanted_files and os.path.getsize(os.path.join(saveDir,fl)) > 0]
 
 need_to_download = [fl for fl in wanted_files if not fl in present_files]
 
-print('Downloading ALL images.')
-os.system('python ./supplementary/download_daily_images_all.py')
-
-#if len(present_files) == 0 or len(need_to_download) <= 1:
-#  print('Downloading ALL images.')
-#  os.system('python ./supplementary/download_daily_images_all.py')
-#
-#else:
-#  print('Downloading MISSING images.')
-#  os.system('python ./supplementary/download_daily_images_missing.py')
+if 'all' in sys.argv[1:]:
+  download_all = True
+elif 'missing' in sys.argv[1:]:
+  download_all = False
+else:
+  download_all = len(present_files) == 0 or len(need_to_download) == 0
+
+if download_all:
+  print('Downloading ALL images.')
+  os.system('python ./supplementary/download_daily_images_all.py')
+
+else:
+  print('Downloading MISSING images (' + str(len(need_to_download)) + ' of ' + str(len(wanted_files)) + ' listed files):')
+  for fl in need_to_download:
+    print('... ' + fl)
+  os.system('python ./supplementary/download_daily_images_all.py missing')
@@ -0,0 +1,821 @@
+"""
+This module holds the download helpers used by download_daily_images_all.py (and its _windows copy).
+
+Instead of downloading each image as soon as its url is known, the download scripts collect all the images
+as DownloadJobs first, and runDownloads() then downloads them in parallel.
+
+All the requests go through one shared requests.Session (getSession), which keeps a pool of open (keep-alive) connections
+for each website, so the ~100 UWIN-CM frames from orca.atmos.washington.edu reuse a handful of connections instead of
+opening a new TCP+TLS connection for every image.
+
+The ETag and Last-Modified headers of every downloaded image are kept in a small on-disk cache (loadValidatorCache/saveValidatorCache).
+When the image is requested again, they are sent as If-None-Match/If-Modified-Since, and if the website answers 304 (not modified),
+the image already in ./figs/ is kept as it is (and still counts as a good link).
+
+A download that hangs or fails because of the network (timeouts, dropped connections, 429/5xx answers) is tried again a few times,
+waiting a little longer (and a random part of it) each time. All the downloads of a switch, and all the downloads together, have a time budget
+(runDownloads group_budget and run_budget). When it is used up, the remaining images are skipped and the switch is set to False, so one
+slow website does not hold up the whole forecast.
+
+Every image is first saved to a temporary file next to it, which is checked (its size against Content-Length, and the start and end
+of the file against the PNG/JPEG/GIF formats) and then renamed to the final name in one step. An image in ./figs/ is therefore always
+complete, which is what the missing mode (and the cropping script) relies on.
+
+Animations are only made if all their frames are there, so before anything is downloaded, every frame of every animation
+(DownloadJob animation) is checked with a HEAD request. If a frame is not on the website yet (e.g. a model run is late), none of
+the frames of that animation are downloaded. Frames that are already present in missing mode do not need to be on the website.
+
+The image urls found on the NASA GEOS (FLUID) pages are kept in a second cache, for one GEOS run (fInitialTime). When the script is run
+again for the same run, the pages are not read again.
+
+Required packages: codecs, collections, concurrent.futures, html.parser, json, os, random, requests, tempfile, threading, time, urllib.
+
+
+Updates:
+ - 2026-10-18: Created. Moved downloadLink and write_switch over from download_daily_images_all.py, added a parallel download engine (runDownloads).
+ - 2026-10-18: Downloads and GEOS page requests share a pooled requests.Session (openSession/getSession). Moved find_geos_img_url over from download_daily_images_all.py.
+ - 2026-10-18: Conditional downloads with an on-disk ETag/Last-Modified cache, so unchanged images are not downloaded again.
+ - 2026-10-18: runDownloads can download only the images that are missing in ./figs/ (missing_only). Urls can be functions, so that pages are only read for images that are downloaded.
+ - 2026-10-18: The GEOS pages are all read at the same time in a separate pool before their images are downloaded, and the image urls found on them are kept in an on-disk cache for the GEOS run (loadGeosUrlCache/saveGeosUrlCache).
+ - 2026-10-18: find_geos_img_url scans the GEOS page while it is downloaded (GeosImageFinder) and stops reading it at the first matching image, instead of parsing the whole page with bs4/lxml.
+ - 2026-10-18: Downloads have connect/read timeouts and are retried (with a growing, random wait) after network errors and 429/5xx answers. runDownloads has a time budget for each switch and for all downloads; a switch that runs out of time is set to False. The per-host limit is only held while an image is downloaded, not while waiting to retry it.
+ - 2026-10-18: Images are downloaded to a temporary file, checked (size and image format, see checkImage), and only then renamed to their final name, so ./figs/ never has half-written images.
+ - 2026-10-18: The frames of each animation are first checked with HEAD requests (probeLink), and none of them are downloaded if a frame is not on the website yet (runDownloads probe).
+ - 2026-10-18: runDownloads tells (on_switch_done) as soon as all the images of a switch are done, so the images of that switch can be used while the others are downloading.
+ - 2026-10-18: sync_switches writes the switch file to the disk (fsync) as each switch is done.
+ - 2026-10-18: linkChanged asks the website (HEAD, with the validators of the last download) whether an image has changed, for the watch mode.
+ - 2026-10-18: A 304 answer to a download that sent no ETag/Last-Modified counts as not available (no retries, nothing written).
+"""
+
+import codecs
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from html.parser import HTMLParser
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+
+
+# switch: name of the switch the image belongs to (e.g. nhc_analysis)
+# url: the url of the image, or a list of urls that are tried in order until one of them works. A url can also be a
+#      function that returns the url (e.g. find_geos_img_url for a GEOS page), which is only called when the image is downloaded
+# imageName: the complete path and name of the saved image (e.g. ./saveDir/imagename...)
+# animation: name of the animation the image is a frame of (e.g. uwincm_clouds_day1_anim_), or None. The frames of an animation are
+#            only downloaded if all of them are on the website (see runDownloads probe)
+DownloadJob = namedtuple('DownloadJob', ['switch', 'url', 'imageName', 'animation'], defaults=[None])
+
+chunk_size = 64*1024 # bytes read at a time when saving an image
+
+transient_status = [429, 500, 502, 503, 504] # answers after which the download is tried again
+backoff_base = 2 # seconds to wait before the first retry (doubled for each further retry)
+backoff_max = 30 # longest wait between two retries (seconds)
+
+
+class DeadlineReached(Exception):
+  """
+  Raised when a download runs out of its time budget (see runDownloads).
+  """
+
+
+class InvalidImage(Exception):
+  """
+  Raised when a downloaded file is not a complete image (see checkImage). The download is tried again, like after a network error.
+  """
+
+session = None
+session_lock = threading.Lock()
+
+# url -> {'imageName': ..., 'etag': ..., 'last_modified': ...}
+validator_cache = {}
+validator_lock = threading.Lock()
+
+# GEOS page url -> image url, for the GEOS run geos_cache_init
+geos_url_cache = {}
+geos_cache_init = None
+geos_cache_lock = threading.Lock()
+
+
+def openSession(pool_connections=10, pool_maxsize=4):
+  """
+  openSession(pool_connections, pool_maxsize)
+
+  Creates the shared requests.Session used for all downloads, replacing the previous one (if any).
+
+  Parameters:
+  - pool_connections: number of websites for which a pool of open connections is kept
+  - pool_maxsize: number of open connections kept for each website (should be at least the number of downloads running at the same time against one website)
+  - session: returned requests.Session
+  """
+  global session
+
+  new_session = requests.Session()
+  adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+  new_session.mount('https://', adapter)
+  new_session.mount('http://', adapter)
+
+  # certificates are not checked (the ICAP aerosol website does not pass the check)
+  new_session.verify = False
+  urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+  with session_lock:
+    old_session = session
+    session = new_session
+
+  if old_session is not None:
+    old_session.close()
+
+  return new_session
+
+
+def getSession():
+  """
+  getSession()
+
+  Returns the shared requests.Session, creating it with the default pool sizes if openSession has not been called yet.
+  """
+
+  with session_lock:
+    current = session
+  if current is None:
+    current = openSession()
+
+  return current
+
+
+def loadValidatorCache(cacheFile):
+  """
+  loadValidatorCache(cacheFile)
+
+  Reads the ETag/Last-Modified values saved by a previous run. A missing or unreadable file starts an empty cache.
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.download_cache.json)
+  """
+  global validator_cache
+
+  try:
+    with open(cacheFile, 'r') as fl:
+      cache = json.load(fl)
+  except (OSError, ValueError):
+    cache = {}
+
+  with validator_lock:
+    validator_cache = cache
+
+  return
+
+
+def saveValidatorCache(cacheFile):
+  """
+  saveValidatorCache(cacheFile)
+
+  Writes the ETag/Last-Modified values of the downloaded images, so the next run can ask for them conditionally.
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.download_cache.json)
+  """
+
+  with validator_lock:
+    data = json.dumps(validator_cache, indent=1, sort_keys=True)
+
+  with open(cacheFile + '.tmp', 'w') as fl:
+    fl.write(data)
+  os.replace(cacheFile + '.tmp', cacheFile)
+
+  return
+
+
+def conditionalHeaders(imageUrl, imageName):
+  """
+  conditionalHeaders(imageUrl, imageName)
+
+  Returns the If-None-Match/If-Modified-Since request headers for the url, if it was downloaded before to the same imageName
+  and that image is still there (and not empty). Otherwise returns no headers, so the image is downloaded in full.
+  """
+
+  with validator_lock:
+    entry = validator_cache.get(imageUrl)
+
+  headers = {}
+  if entry is None or entry.get('imageName') != imageName:
+    return headers
+  if not os.path.isfile(imageName) or os.path.getsize(imageName) == 0:
+    return headers
+
+  if entry.get('etag'):
+    headers['If-None-Match'] = entry['etag']
+  if entry.get('last_modified'):
+    headers['If-Modified-Since'] = entry['last_modified']
+
+  return headers
+
+
+def rememberValidators(imageUrl, imageName, response):
+  """
+  rememberValidators(imageUrl, imageName, response)
+
+  Keeps the ETag/Last-Modified headers of a downloaded image in the cache (or forgets the url if the website sends neither).
+  """
+
+  etag = response.headers.get('ETag')
+  last_modified = response.headers.get('Last-Modified')
+
+  with validator_lock:
+    if etag or last_modified:
+      validator_cache[imageUrl] = {'imageName': imageName, 'etag': etag, 'last_modified': last_modified}
+    else:
+      validator_cache.pop(imageUrl, None)
+
+  return
+
+
+def loadGeosUrlCache(cacheFile, initTime):
+  """
+  loadGeosUrlCache(cacheFile, initTime)
+
+  Reads the GEOS image urls found by a previous run. The urls are only kept if they were found for the same GEOS run (initTime),
+  otherwise (or if the file is missing or unreadable) the cache starts empty.
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.geos_url_cache.json)
+  - initTime: the initialization time of the GEOS run (e.g. 20220826T120000)
+  """
+  global geos_url_cache, geos_cache_init
+
+  try:
+    with open(cacheFile, 'r') as fl:
+      cache = json.load(fl)
+  except (OSError, ValueError):
+    cache = {}
+
+  urls = cache.get('urls', {}) if cache.get('fInitialTime') == initTime else {}
+
+  with geos_cache_lock:
+    geos_url_cache = urls
+    geos_cache_init = initTime
+
+  return
+
+
+def saveGeosUrlCache(cacheFile):
+  """
+  saveGeosUrlCache(cacheFile)
+
+  Writes the GEOS image urls found so far (for the GEOS run given to loadGeosUrlCache).
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.geos_url_cache.json)
+  """
+
+  with geos_cache_lock:
+    data = json.dumps({'fInitialTime': geos_cache_init, 'urls': geos_url_cache}, indent=1, sort_keys=True)
+
+  with open(cacheFile + '.tmp', 'w') as fl:
+    fl.write(data)
+  os.replace(cacheFile + '.tmp', cacheFile)
+
+  return
+
+
+def backoffDelay(attempt):
+  """
+  backoffDelay(attempt)
+
+  Returns the time (in seconds) to wait before retry number attempt (1, 2, ...): backoff_base doubled for each further retry, at most
+  backoff_max, of which a random part (up to half) is left out, so that the downloads that failed together are not retried together.
+  """
+
+  delay = min(backoff_max, backoff_base * 2**(attempt-1))
+
+  return delay * random.uniform(0.5, 1.0)
+
+
+def downloadLink(imageUrl, imageName, timeout=(10, 60), retries=3, deadline=None, limit=None):
+  """
+  downloadLink (imageUrl, imageName, timeout, retries, deadline, limit)
+
+  Will attempt to download the image located at imageUrl and save it at the provided imageName. If the image is not available, it will print out the message and return False.
+  If the image was downloaded before and has not changed on the website since (304), the saved image is kept and counts as downloaded.
+  Network errors (timeouts, dropped connections), 429/5xx answers and incomplete images are retried up to retries times, after a growing wait (backoffDelay).
+
+  Parameters:
+  - imageUrl: the url of the image attempting to download (e.g. https:// ...)
+  - imageName: the complete path and name of the saved image (e.g. ./saveDir/imagename...)
+  - timeout: time (in seconds) to wait for the website, as (connect, read)
+  - retries: number of times the download is tried again (e.g. 3)
+  - deadline: time (time.time()) by which the download has to be done, or None (DeadlineReached is raised once it is passed)
+  - limit: semaphore of the website (e.g. the per-host limit of runDownloads), or None
+  - downloaded: returned Boolean, True if the image was downloaded (or has not changed since the last download)
+  """
+
+  attempt = 0
+  while True:
+    if limit is not None and not limit.acquire(timeout=None if deadline is None else max(0, deadline - time.time())):
+      raise DeadlineReached('waiting for ' + urlHost(imageUrl))
+    try:
+      try:
+        return getImage(imageUrl, imageName, timeout, deadline)
+      finally:
+        if limit is not None:
+          limit.release()
+    except requests.HTTPError as err:
+      if err.response is None or err.response.status_code not in transient_status:
+        print('... ... Image currently not available: ' + os.path.basename(imageName))
+        return False
+      reason = 'HTTP ' + str(err.response.status_code)
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as err:
+      reason = type(err).__name__
+    except InvalidImage as err:
+      reason = str(err)
+
+    attempt += 1
+    if attempt > retries:
+      print('... ... Image currently not available: ' + os.path.basename(imageName) + ' (' + reason + ', tried ' + str(attempt) + ' times)')
+      return False
+
+    wait = backoffDelay(attempt)
+    if deadline is not None and time.time() + wait >= deadline:
+      raise DeadlineReached(reason)
+    print('... ... Retrying ' + os.path.basename(imageName) + ' in ' + '{:.1f}'.format(wait) + ' s (' + reason + ').')
+    time.sleep(wait)
+
+
+def probeLink(imageUrl, timeout=(10, 60)):
+  """
+  probeLink(imageUrl, timeout)
+
+  Asks the website (with a HEAD request, which does not send the image) whether the image at imageUrl is there.
+  Returns True if it is, False if the website says it is not (404/410), and None if that cannot be told (any other answer or error,
+  e.g. websites that do not answer HEAD requests), in which case the image should just be downloaded.
+  """
+
+  try:
+    with getSession().head(imageUrl, timeout=timeout, allow_redirects=True) as response:
+      if response.status_code in [404, 410]:
+        return False
+      if response.ok:
+        return True
+  except requests.RequestException:
+    pass
+
+  return None
+
+
+def linkChanged(imageUrl, imageName, timeout=(10, 60)):
+  """
+  linkChanged(imageUrl, imageName, timeout)
+
+  Asks the website (with a HEAD request, sending the ETag/Last-Modified of the last download of imageUrl to imageName) whether the
+  image has changed since it was downloaded.
+  Returns True if it has (or if it was never downloaded from this url), False if it has not or is not on the website (yet), and None
+  if that cannot be told (the website sends neither ETag nor Last-Modified, or does not answer).
+  """
+
+  headers = conditionalHeaders(imageUrl, imageName)
+  try:
+    with getSession().head(imageUrl, headers=headers, timeout=timeout, allow_redirects=True) as response:
+      if response.status_code == 304 or response.status_code in [404, 410]:
+        return False
+      if not response.ok:
+        return None
+
+      etag = response.headers.get('ETag')
+      last_modified = response.headers.get('Last-Modified')
+      if not etag and not last_modified:
+        return None
+      if len(headers) == 0:
+        return True
+
+      # some websites ignore the conditional headers of HEAD requests, and answer 200 anyway
+      if etag and headers.get('If-None-Match') == etag:
+        return False
+      if not etag and last_modified and headers.get('If-Modified-Since') == last_modified:
+        return False
+      return True
+  except requests.RequestException:
+    pass
+
+  return None
+
+
+def checkImage(fileName, expected_size=None):
+  """
+  checkImage(fileName, expected_size)
+
+  Cheap check of a downloaded file: its size has to match expected_size (the Content-Length, if known), and it has to start and end
+  like a PNG, JPEG or GIF image (the format is taken from the file itself, since some images are saved with another extension).
+  Returns None if the image looks complete, or the reason why it does not.
+
+  Parameters:
+  - fileName: the complete path and name of the downloaded file
+  - expected_size: number of bytes the website said it would send, or None
+  """
+
+  size = os.path.getsize(fileName)
+  if expected_size is not None and size != expected_size:
+    return 'got ' + str(size) + ' of ' + str(expected_size) + ' bytes'
+
+  with open(fileName, 'rb') as fl:
+    head = fl.read(8)
+    fl.seek(max(0, size-32))
+    tail = fl.read().rstrip(b'\x00\r\n ')
+
+  if head.startswith(b'\x89PNG\r\n\x1a\n'):
+    complete = tail.endswith(b'IEND\xaeB`\x82')
+  elif head.startswith(b'\xff\xd8'):
+    complete = tail.endswith(b'\xff\xd9')
+  elif head.startswith(b'GIF87a') or head.startswith(b'GIF89a'):
+    complete = tail.endswith(b'\x3b')
+  else:
+    return 'not a PNG, JPEG or GIF image'
+
+  if not complete:
+    return 'image is cut off'
+
+  return None
+
+
+def getImage(imageUrl, imageName, timeout, deadline):
+  """
+  getImage(imageUrl, imageName, timeout, deadline)
+
+  Does a single download of the image for downloadLink (the errors are raised, and handled by downloadLink).
+  The image is saved to a temporary file in the same directory, checked (checkImage), and then renamed to imageName.
+  A 304 answer to a request that did not send validators raises requests.HTTPError (the image is not available).
+  """
+
+  headers = conditionalHeaders(imageUrl, imageName)
+  with getSession().get(imageUrl, stream=True, headers=headers, timeout=timeout) as response:
+    if response.status_code == 304:
+      if len(headers) > 0:
+        print('... ... Image not changed since last download: ' + os.path.basename(imageName))
+        return True
+      # a 304 to a request without ETag/Last-Modified has no image and no saved image it refers to: not retried, nothing is written
+      raise requests.HTTPError('304 Not Modified without validators', response=response)
+
+    response.raise_for_status()
+
+    # Content-Length is the size before decompression, so it can only be checked for images that are sent as they are
+    expected_size = None
+    if 'Content-Length' in response.headers and response.headers.get('Content-Encoding', 'identity') == 'identity':
+      expected_size = int(response.headers['Content-Length'])
+
+    # the temporary name does not contain the image name, so that it is not picked up by the scripts that list ./figs/
+    fd, tmpName = tempfile.mkstemp(prefix='.download_', suffix='.tmp', dir=os.path.dirname(imageName) or '.')
+    try:
+      with os.fdopen(fd, 'wb') as fl:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+          fl.write(chunk)
+          if deadline is not None and time.time() >= deadline:
+            raise DeadlineReached('still downloading')
+
+      problem = checkImage(tmpName, expected_size)
+      if problem is not None:
+        raise InvalidImage(problem)
+
+      os.chmod(tmpName, 0o644)
+      os.replace(tmpName, imageName)
+    except Exception:
+      if os.path.isfile(tmpName):
+        os.remove(tmpName)
+      raise
+    rememberValidators(imageUrl, imageName, response)
+
+  return True
+
+
+class GeosImageFinder(HTMLParser):
+  """
+  GeosImageFinder(text_pattern)
+
+  HTML parser that can be fed a webpage piece by piece, and remembers the source of the first <img> that contains text_pattern (in src).
+  """
+
+  def __init__(self, text_pattern):
+    HTMLParser.__init__(self)
+    self.text_pattern = text_pattern
+    self.src = None
+
+  def handle_starttag(self, tag, attrs):
+    if self.src is not None or tag != 'img':
+      return
+
+    src = dict(attrs).get('src')
+    if src is not None and self.text_pattern in src:
+      self.src = src
+
+
+def find_geos_img_url(webpage, text_pattern, timeout):
+  """
+  find_geos_img_url(webpage, text_pattern, timeout)
+
+  Will read the NASA GEOS (FLUID) webpage and return the url of the first image whose source contains text_pattern.
+  The webpage is scanned while it is downloaded, and the rest of it is not read once the image is found.
+  If the url was already found for this webpage (see loadGeosUrlCache), the webpage is not read again.
+
+  Parameters:
+  - webpage: the url of the FLUID page showing the image
+  - text_pattern: the part of the image source to look for (e.g. /missions/static//plots/)
+  - timeout: time (in seconds) to wait for the website
+  - img_url: returned url of the image, or -1 if it was not found
+  """
+
+  with geos_cache_lock:
+    if webpage in geos_url_cache:
+      return geos_url_cache[webpage]
+
+  geos_domain = 'https://fluid.nccs.nasa.gov'
+  finder = GeosImageFinder(text_pattern)
+  decoder = codecs.getincrementaldecoder('utf8')(errors='replace')
+  with getSession().get(webpage, timeout=timeout, stream=True) as response:
+    for chunk in response.iter_content(chunk_size=chunk_size):
+      finder.feed(decoder.decode(chunk))
+      if finder.src is not None:
+        break
+  if finder.src is None:
+    finder.feed(decoder.decode(b'', final=True))
+    finder.close()
+
+  img_url = -1
+  if finder.src is not None:
+    if str.find(finder.src, text_pattern) == 0:
+      img_url = geos_domain + finder.src
+    else:
+      img_url = finder.src
+
+  if img_url != -1:
+    with geos_cache_lock:
+      geos_url_cache[webpage] = img_url
+
+  return img_url
+
+
+def write_switch(switch_name, status, fl):
+  """
+  write_switch(switch_name, status, fl)
+
+  Based on what files this script is able to download, it writes the True/False switches for the cropping script.
+
+  Parameters:
+  - switch_name: name of the switch (e.g. nhc_analysis)
+  - status: a list of true/false values on whether it was able to download
+  - fl: open file to write into.
+  """
+
+  if sum(status) > 0:
+    fl.write(switch_name + ' = True \n')
+  elif sum(status) == 0:
+    fl.write(switch_name + ' = False \n')
+
+
+  return
+
+
+def sync_switches(fl):
+  """
+  sync_switches(fl)
+
+  Writes the switches written so far (write_switch) to the disk, so the cropping script (or run_forecast_scripts.py) can read them
+  right away, without waiting for the file to settle.
+
+  Parameters:
+  - fl: open switch file (e.g. switches_process.txt)
+  """
+
+  fl.flush()
+  os.fsync(fl.fileno())
+
+  return
+
+
+def imagePresent(imageName):
+  """
+  imagePresent(imageName)
+
+  Returns True if the image has already been downloaded (the file exists and is not empty).
+  """
+
+  return os.path.isfile(imageName) and os.path.getsize(imageName) > 0
+
+
+def jobUrls(job):
+  """
+  jobUrls(job)
+
+  Returns the list of urls to try for a DownloadJob (the url field can be a single url, or a list of them).
+  """
+
+  if isinstance(job.url, (list, tuple)):
+    return list(job.url)
+
+  return [job.url]
+
+
+def urlHost(url):
+  """
+  urlHost(url)
+
+  Returns the host name of the url (e.g. orca.atmos.washington.edu), which is used to limit the number of downloads from a single website.
+  """
+
+  return urlparse(str(url)).netloc
+
+
+def interleaveHosts(jobs):
+  """
+  interleaveHosts(jobs)
+
+  Reorders the jobs so that consecutive jobs come from different hosts (round robin). This way the workers are spread over all the websites,
+  instead of all of them waiting on the per-host limit of the first website in the list.
+
+  Parameters:
+  - jobs: list of (index, DownloadJob)
+  """
+
+  per_host = {}
+  for ind, job in jobs:
+    per_host.setdefault(urlHost(jobUrls(job)[0]), []).append((ind, job))
+
+  ordered = []
+  queues = list(per_host.values())
+  while len(queues) > 0:
+    for queue in queues:
+      ordered.append(queue.pop(0))
+    queues = [queue for queue in queues if len(queue) > 0]
+
+  return ordered
+
+
+def runDownloads(jobs, max_workers=8, max_per_host=4, missing_only=False, max_resolvers=4, timeout=(10, 60), retries=3, group_budget=None, run_budget=None,
+                 probe=True, on_switch_done=None):
+  """
+  runDownloads(jobs, max_workers, max_per_host, missing_only, max_resolvers, timeout, retries, group_budget, run_budget, probe, on_switch_done)
+
+  Will download all the images in jobs in parallel, with at most max_workers downloads running at the same time, and at most
+  max_per_host of them running against a single website.
+  The urls that are functions (e.g. GEOS pages) are all called first, max_resolvers at a time in a separate pool, and the jobs that
+  wait for them are downloaded last, so that the slow pages do not hold up the other downloads.
+  If the downloads of a switch take longer than group_budget, or all the downloads take longer than run_budget, the images that are not
+  done yet are skipped, and the switches they belong to are set to False.
+  If probe is True, all the frames of each animation are first checked with HEAD requests (probeLink), and the animations that are
+  missing a frame on the website are not downloaded at all.
+
+  Parameters:
+  - jobs: list of DownloadJob(switch, url, imageName)
+  - max_workers: number of images downloaded at the same time
+  - max_per_host: number of images downloaded at the same time from a single website
+  - missing_only: if True, images that are already present (and not empty) are not downloaded again, and count as good links
+  - max_resolvers: number of urls (functions) that are found at the same time
+  - timeout, retries: passed to downloadLink for every image
+  - group_budget: time (in seconds) the downloads of one switch may take, counted from its first download, or None for no limit
+  - run_budget: time (in seconds) all the downloads may take, or None for no limit
+  - probe: if True, the frames of an animation are only downloaded if all of them are on the website
+  - on_switch_done: function(switch, status) that is called as soon as all the images of a switch are done (while the other switches are
+                    still downloading), with its list of true/false values, or None
+  - count_good_links, count_bad_links: returned number of images that were and were not downloaded
+  - status: returned dictionary with a list of true/false values for each switch (in the order in which the switches first appear in jobs), that can be passed to write_switch
+  """
+
+  host_limits = {}
+  host_lock = threading.Lock()
+
+  def hostLimit(url):
+    with host_lock:
+      if urlHost(url) not in host_limits:
+        host_limits[urlHost(url)] = threading.BoundedSemaphore(max_per_host)
+      return host_limits[urlHost(url)]
+
+  run_start = time.time()
+  group_start = {}
+  expired = set()
+
+  def jobDeadline(switch):
+    deadlines = []
+    if run_budget is not None:
+      deadlines.append(run_start + run_budget)
+    if group_budget is not None:
+      with host_lock:
+        group_start.setdefault(switch, time.time())
+        deadlines.append(group_start[switch] + group_budget)
+
+    return min(deadlines) if len(deadlines) > 0 else None
+
+  def timeLeft(deadline):
+    if deadline is None:
+      return None
+    if time.time() >= deadline:
+      raise DeadlineReached('out of time')
+
+    return deadline - time.time()
+
+  # (job index, url index) -> future of the url
+  resolving = {}
+
+  # (switch, animation) -> number of frames that are not on the website (two switches can download the same animation from different websites)
+  incomplete = {}
+
+  def probeJob(job):
+    with hostLimit(job.url):
+      return probeLink(job.url, timeout=timeout)
+
+  def runJob(ind, job):
+    if missing_only and imagePresent(job.imageName):
+      return True
+    if (job.switch, job.animation) in incomplete:
+      return False
+
+    deadline = jobDeadline(job.switch)
+    dl = False
+    for pos, url in enumerate(jobUrls(job)):
+      try:
+        if (ind, pos) in resolving:
+          url = resolving[(ind, pos)].result(timeout=timeLeft(deadline))
+        if not isinstance(url, str):
+          print('... ... Could not find the url of ' + os.path.basename(job.imageName))
+          continue
+        # the host limit is only held while the image is downloaded, not while waiting to retry it
+        dl = downloadLink(url, job.imageName, timeout=timeout, retries=retries, deadline=deadline, limit=hostLimit(url))
+      except (DeadlineReached, TimeoutError):
+        print('... ... Out of time for ' + job.switch + ', skipping ' + os.path.basename(job.imageName))
+        with host_lock:
+          expired.add(job.switch)
+        return False
+      except Exception as err:
+        print('... ... Could not download ' + os.path.basename(job.imageName) + ': ' + str(err))
+        dl = False
+      if dl:
+        break
+
+    return dl
+
+  if missing_only:
+    present = [job for job in jobs if imagePresent(job.imageName)]
+    print('... ' + str(len(present)) + ' of ' + str(len(jobs)) + ' images are already present and will not be downloaded again.')
+
+  # only the frames with a single, known url can be checked (and need to be, if they are not present already in missing mode)
+  to_probe = [job for job in jobs if job.animation is not None and isinstance(job.url, str)]
+  if missing_only:
+    to_probe = [job for job in to_probe if not imagePresent(job.imageName)]
+  if probe and len(to_probe) > 0:
+    print('... Checking that the ' + str(len(to_probe)) + ' animation frames are on the websites.')
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+      ordered = [job for ind, job in interleaveHosts(list(enumerate(to_probe)))]
+      for job, available in zip(ordered, pool.map(probeJob, ordered)):
+        if available == False:
+          incomplete[(job.switch, job.animation)] = incomplete.get((job.switch, job.animation), 0) + 1
+    for switch, animation in incomplete:
+      print('... ... ' + str(incomplete[(switch, animation)]) + ' frames of ' + animation + ' (' + switch + ') are not on the website yet, the animation is not downloaded.')
+
+  results = [False for job in jobs]
+  if len(jobs) > 0:
+    resolver = ThreadPoolExecutor(max_workers=max_resolvers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+      for ind, job in enumerate(jobs):
+        if (missing_only and imagePresent(job.imageName)) or (job.switch, job.animation) in incomplete:
+          continue
+        for pos, url in enumerate(jobUrls(job)):
+          if callable(url):
+            resolving[(ind, pos)] = resolver.submit(url)
+
+      waiting = set(key[0] for key in resolving)
+      ordered = interleaveHosts(list(enumerate(jobs)))
+      ordered = [(ind, job) for ind, job in ordered if ind not in waiting] + [(ind, job) for ind, job in ordered if ind in waiting]
+      futures = {pool.submit(runJob, ind, job): ind for ind, job in ordered}
+      remaining = {}
+      for job in jobs:
+        remaining[job.switch] = remaining.get(job.switch, 0) + 1
+      for future in as_completed(futures):
+        ind = futures[future]
+        results[ind] = future.result()
+        switch = jobs[ind].switch
+        remaining[switch] -= 1
+        if remaining[switch] == 0 and on_switch_done is not None:
+          on_switch_done(switch, [results[num] and switch not in expired for num, job in enumerate(jobs) if job.switch == switch])
+
+    # urls that are not needed anymore (their switch ran out of time) are not looked for
+    for future in resolving.values():
+      future.cancel()
+    resolver.shutdown(wait=False)
+
+  for ind, job in enumerate(jobs):
+    if job.switch in expired:
+      results[ind] = False
+  for switch in sorted(expired):
+    print('... Time budget used up for ' + switch + ', it is set to False.')
+
+  status = {}
+  for job, dl in zip(jobs, results):
+    status.setdefault(job.switch, []).append(dl)
+
+  count_good_links = sum(results)
+  count_bad_links = len(results) - count_good_links
+
+  return count_good_links, count_bad_links, status
@@ -0,0 +1,650 @@
+"""
+This module holds the image processing used by crop_edit_daily_images.py (and its _windows copy).
+
+Instead of calling ImageMagick (convert) once for every step, and writing the image to ./figs_cropped/ after each of them,
+each image is read once, all its steps (crop, marker, resize/extent, annotations, appended images) are done in memory with
+Pillow, and it is written once.
+
+The steps of an image are a list of small tuples, made with the functions below, e.g.
+  processImage(inName, outName, [crop('740x450+25+110'), circle(448, 172, 5, 'white')])
+They do the same as the ImageMagick options they replace (-crop ... +repage, -draw 'circle ...', -resize, -extent, -annotate, +append/-append).
+
+The same steps can also be done by ImageMagick (backend 'convert', or when PIL is not installed): they are then turned into a single
+convert call per output image (convertArgs), with all the options chained, instead of one call (and one intermediate file) per step.
+
+Many images can be processed at the same time, on all CPU cores, with runImageTasks (a list of ImageTask, each one image to process).
+The worker processes can be kept for all the runImageTasks calls of a run (openImagePool), so they are only started (and import PIL) once.
+
+With cached=True, runImageTasks skips the images whose inputs and steps did not change since they were last written (stage_cache.py).
+
+Required packages: collections, concurrent.futures, functools, multiprocessing, os, subprocess, threading, PIL (optional, ImageMagick is used without it), stage_cache (in this directory).
+
+
+Updates:
+ - 2026-10-18: Created.
+ - 2026-10-18: Added the ImageMagick backend (convertArgs, setBackend), which does all the steps of an image in one convert call.
+ - 2026-10-18: Added ImageTask and runImageTasks, which process images in a pool of worker processes (tasks wait for the images listed in their after).
+ - 2026-10-18: The ImageMagick options of a list of steps are only put together once (convertOptions is cached), for the products of product_geometry.py.
+ - 2026-10-18: Markers and text are drawn once per product and image size on small RGBA overlay sprites (overlaySprites), which are pasted on every image, instead of being drawn (and the text rendered) again for every frame.
+ - 2026-10-18: The worker processes can be kept between runImageTasks calls (openImagePool/closeImagePool), and are started with spawn (worker_start_method). The last decoded images are kept in memory (loadImage).
+ - 2026-10-18: runImageTasks can skip the images whose input images and steps did not change (cached, taskDigest).
+ - 2026-10-18: processImage raises an error when ImageMagick fails, so runImageTasks counts the image as failed (and does not cache it).
+"""
+
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+import multiprocessing
+import os
+import subprocess
+import threading
+
+from stage_cache import isCurrent, rememberOutputs, stageDigest
+
+try:
+  from PIL import Image, ImageDraw, ImageFont, ImageSequence
+except ImportError:
+  Image = None
+
+
+image_backend = 'pillow' # 'pillow' (steps done in memory) or 'convert' (steps done by a single ImageMagick call)
+convert_cmd = ['convert'] # how ImageMagick is called (['magick', 'convert'] on Windows)
+jpeg_quality = 92 # quality of the .jpg images that are written (the ImageMagick default)
+worker_start_method = 'spawn' # how the worker processes are started: 'spawn' is safe while other threads (e.g. downloads) are running, 'fork' starts faster
+decoded_cache_size = 8 # number of decoded images kept in memory (e.g. the palette samples of a movie, which are read again for the movie)
+
+# worker processes kept for all runImageTasks calls (openImagePool), or None
+image_pool = None
+
+# (complete path, size, modification time) -> decoded RGB image, the last decoded_cache_size of them
+decoded_images = OrderedDict()
+decoded_lock = threading.Lock()
+
+# an image to process: processImage(inName, outName, steps), once the images in after (complete paths and names) are written
+ImageTask = namedtuple('ImageTask', ['inName', 'outName', 'steps', 'after'], defaults=[()])
+
+# fonts tried (in order) for the annotations
+annotation_fonts = ['DejaVuSans.ttf', 'Arial.ttf', 'arial.ttf', 'Helvetica.ttc', 'LiberationSans-Regular.ttf']
+
+
+# # # STEPS
+def parseGeometry(geometry):
+  """
+  parseGeometry(geometry)
+
+  Returns (width, height, x, y) of an ImageMagick geometry (e.g. 740x450+25+110).
+  """
+
+  size, x, y = geometry.split('+')
+  width, height = size.split('x')
+
+  return int(width), int(height), int(x), int(y)
+
+
+def crop(geometry):
+  """
+  crop(geometry)
+
+  Step that crops the image to geometry (e.g. 740x450+25+110), like -crop geometry +repage.
+  """
+
+  return ('crop',) + parseGeometry(geometry)
+
+
+def circle(xPt, yPt, marker_radius, fill, stroke='black'):
+  """
+  circle(xPt, yPt, marker_radius, fill, stroke)
+
+  Step that draws a marker (e.g. for Sal island), like -fill fill -stroke stroke -draw 'circle xPt,yPt xPt+marker_radius,yPt+marker_radius'.
+  """
+
+  return ('circle', xPt, yPt, marker_radius, fill, stroke)
+
+
+def resize(width, height):
+  """
+  resize(width, height)
+
+  Step that resizes the image to fit in width x height (keeping its aspect ratio), like -resize widthxheight.
+  """
+
+  return ('resize', width, height)
+
+
+def extent(width, height, background='white'):
+  """
+  extent(width, height, background)
+
+  Step that pads (or cuts) the image to width x height, keeping it on the left, like -background background -gravity west -extent widthxheight.
+  """
+
+  return ('extent', width, height, background)
+
+
+def annotate(xPt, yPt, text, pointsize=50, fill='black'):
+  """
+  annotate(xPt, yPt, text, pointsize, fill)
+
+  Step that writes text with its baseline starting at xPt, yPt, like -pointsize pointsize -annotate +xPt+yPt text.
+  """
+
+  return ('annotate', xPt, yPt, text, pointsize, fill)
+
+
+def appendImage(fileName=None, steps=[], below=False):
+  """
+  appendImage(fileName, steps, below)
+
+  Step that joins another image to the right of the image (or below it), like +append (or -append).
+
+  Parameters:
+  - fileName: the complete path and name of the other image, or None to use the original (unprocessed) image again
+  - steps: steps that are done on the other image before it is joined
+  - below: if True, the other image is put below the image, instead of to its right
+  """
+
+  return ('append', fileName, tuple(steps), below)
+
+
+def setBackend(backend, command=None):
+  """
+  setBackend(backend, command)
+
+  Chooses how the steps are done.
+
+  Parameters:
+  - backend: 'pillow' (in memory, the default) or 'convert' (one ImageMagick call per image)
+  - command: how ImageMagick is called (e.g. ['magick', 'convert'] on Windows), or None to keep convert_cmd
+  """
+
+  global image_backend, convert_cmd
+
+  if backend not in ['pillow', 'convert']:
+    raise ValueError('Unknown image backend: ' + str(backend))
+
+  image_backend = backend
+  if command is not None:
+    convert_cmd = list(command)
+
+  return
+
+
+# # # DOING THE STEPS
+@lru_cache(maxsize=None)
+def annotationFont(pointsize):
+  """
+  annotationFont(pointsize)
+
+  Returns the font used for the annotations (the first one of annotation_fonts that is installed).
+  """
+
+  for name in annotation_fonts:
+    try:
+      return ImageFont.truetype(name, pointsize)
+    except OSError:
+      continue
+
+  try:
+    return ImageFont.load_default(pointsize)
+  except TypeError:
+    # older Pillow versions only have a small, fixed size default font
+    return ImageFont.load_default()
+
+
+def joinImages(images, below=False, background='white'):
+  """
+  joinImages(images, below, background)
+
+  Returns the images joined side by side (top aligned), or one below the other (left aligned), like +append/-append.
+  """
+
+  if below:
+    size = (max(img.width for img in images), sum(img.height for img in images))
+  else:
+    size = (sum(img.width for img in images), max(img.height for img in images))
+
+  joined = Image.new('RGB', size, background)
+  offset = 0
+  for img in images:
+    if below:
+      joined.paste(img, (0, offset))
+      offset += img.height
+    else:
+      joined.paste(img, (offset, 0))
+      offset += img.width
+
+  return joined
+
+
+# steps that only draw on the image (they are drawn once on overlay sprites, which are pasted on every image)
+overlay_steps = ['circle', 'annotate']
+
+
+@lru_cache(maxsize=None)
+def groupSteps(steps):
+  """
+  groupSteps(steps)
+
+  Returns the steps with every run of drawing steps (circle, annotate) replaced by one ('overlay', steps) step.
+  """
+
+  grouped = []
+  for step in steps:
+    if step[0] in overlay_steps:
+      if len(grouped) > 0 and grouped[-1][0] == 'overlay':
+        grouped[-1] = ('overlay', grouped[-1][1] + (step,))
+      else:
+        grouped.append(('overlay', (step,)))
+    else:
+      grouped.append(step)
+
+  return tuple(grouped)
+
+
+@lru_cache(maxsize=64)
+def overlaySprites(size, steps):
+  """
+  overlaySprites(size, steps)
+
+  Draws the markers and text of steps once, each on a transparent RGBA sprite, and returns the list of (sprite, position on the image).
+  Each sprite only covers what was drawn on it, and they are kept for the next images of the same size with the same steps
+  (e.g. all the frames of a product).
+
+  Parameters:
+  - size: (width, height) of the image the sprites are pasted on
+  - steps: tuple of circle and annotate steps
+  """
+
+  sprites = []
+  for step in steps:
+    sprite = Image.new('RGBA', size, (0, 0, 0, 0))
+    if step[0] == 'circle':
+      xPt, yPt, marker_radius, fill, stroke = step[1:]
+      # ImageMagick draws the circle through the point (xPt+marker_radius, yPt+marker_radius)
+      radius = (2*marker_radius**2)**0.5
+      ImageDraw.Draw(sprite).ellipse([xPt-radius, yPt-radius, xPt+radius, yPt+radius], fill=fill, outline=stroke, width=1)
+
+    elif step[0] == 'annotate':
+      xPt, yPt, text, pointsize, fill = step[1:]
+      # the (anti-aliased) text is drawn as a mask, so its edges keep the text color
+      mask = Image.new('L', size, 0)
+      ImageDraw.Draw(mask).text((xPt, yPt), text, fill=255, font=annotationFont(pointsize), anchor='ls')
+      sprite = Image.new('RGBA', size, fill)
+      sprite.putalpha(mask)
+
+    box = sprite.getbbox()
+    if box is not None:
+      sprites.append((sprite.crop(box), box[:2]))
+
+  return sprites
+
+
+def applySteps(img, steps, source=None):
+  """
+  applySteps(img, steps, source)
+
+  Does all the steps on the image (in memory), and returns the new image.
+
+  Parameters:
+  - img: RGB PIL image
+  - steps: list of steps (crop, circle, resize, extent, annotate, appendImage)
+  - source: the original image, used by appendImage(None, ...) (img itself if None)
+  """
+
+  if source is None:
+    source = img
+
+  for step in groupSteps(tuple(steps)):
+    if step[0] == 'crop':
+      width, height, x, y = step[1:]
+      img = img.crop((x, y, min(x+width, img.width), min(y+height, img.height)))
+
+    elif step[0] == 'overlay':
+      if img is source:
+        img = img.copy()
+      for sprite, position in overlaySprites(img.size, step[1]):
+        img.paste(sprite, position, sprite)
+
+    elif step[0] == 'resize':
+      width, height = step[1:]
+      scale = min(width/img.width, height/img.height)
+      size = (max(1, round(img.width*scale)), max(1, round(img.height*scale)))
+      if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+
+    elif step[0] == 'extent':
+      width, height, background = step[1:]
+      padded = Image.new('RGB', (width, height), background)
+      padded.paste(img, (0, (height - img.height)//2))
+      img = padded
+
+    elif step[0] == 'append':
+      fileName, other_steps, below = step[1:]
+      other = source if fileName is None else loadImage(fileName)
+      other = applySteps(other, other_steps)
+      img = joinImages([img, other], below=below)
+
+    else:
+      raise ValueError('Unknown image step: ' + str(step[0]))
+
+  return img
+
+
+def loadImage(fileName):
+  """
+  loadImage(fileName)
+
+  Reads an image (the first frame, for animations) as an RGB PIL image. The last images read are kept (decoded_cache_size), and are not
+  read again while the file is not changed, so the returned image is shared and should not be changed (steps make new images).
+  """
+
+  stat = os.stat(fileName)
+  key = (os.path.abspath(fileName), stat.st_size, stat.st_mtime_ns)
+  with decoded_lock:
+    if key in decoded_images:
+      decoded_images.move_to_end(key)
+      return decoded_images[key]
+
+  with Image.open(fileName) as img:
+    decoded = img.convert('RGB')
+
+  with decoded_lock:
+    decoded_images[key] = decoded
+    while len(decoded_images) > decoded_cache_size:
+      decoded_images.popitem(last=False)
+
+  return decoded
+
+
+def saveImage(img, fileName):
+  """
+  saveImage(img, fileName)
+
+  Writes the image, in the format given by the extension of fileName (e.g. the UofUtah .png images are saved as .jpg).
+  """
+
+  if os.path.splitext(fileName)[1].lower() in ['.jpg', '.jpeg']:
+    img.save(fileName, quality=jpeg_quality)
+  else:
+    img.save(fileName)
+
+  return
+
+
+def processImage(inName, outName, steps, backend=None):
+  """
+  processImage(inName, outName, steps, backend)
+
+  Reads the image inName once, does all the steps on it in memory, and writes the result to outName once.
+  For an animation (.gif), the steps are done on every frame, and the frames are written with their original durations.
+  Raises RuntimeError if ImageMagick fails (the 'convert' backend), so the image counts as not processed, as it does when PIL fails.
+
+  Parameters:
+  - inName: the complete path and name of the image to process (e.g. ./figs/imagename...)
+  - outName: the complete path and name of the processed image (e.g. ./figs_cropped/imagename...)
+  - steps: list of steps (crop, circle, resize, extent, annotate, appendImage)
+  - backend: 'pillow' or 'convert', or None to use image_backend (ImageMagick is always used if PIL is not installed)
+  """
+
+  if backend is None:
+    backend = image_backend
+
+  if backend == 'convert' or Image is None:
+    cmd = convertArgs(inName, outName, steps)
+    returncode = subprocess.run(cmd).returncode
+    if returncode != 0:
+      raise RuntimeError('ImageMagick exited with status ' + str(returncode))
+    return
+
+  with Image.open(inName) as img:
+    if getattr(img, 'n_frames', 1) > 1:
+      frames, durations = [], []
+      for frame in ImageSequence.Iterator(img):
+        durations.append(frame.info.get('duration', 100))
+        frames.append(applySteps(frame.convert('RGB'), steps))
+      frames[0].save(outName, save_all=True, append_images=frames[1:], duration=durations, loop=img.info.get('loop', 0))
+      return
+
+    source = img.convert('RGB')
+
+  saveImage(applySteps(source, steps), outName)
+
+  return
+
+
+def processTask(task, backend, command):
+  """
+  processTask(task, backend, command)
+
+  Does one ImageTask in a worker process (which does not know the backend chosen with setBackend in the main process).
+  """
+
+  setBackend(backend, command)
+  processImage(task.inName, task.outName, task.steps)
+
+  return task.outName
+
+
+def openImagePool(max_workers=None):
+  """
+  openImagePool(max_workers)
+
+  Starts the worker processes (max_workers of them, None: one per CPU core), which are then used by all the runImageTasks calls until
+  closeImagePool. They keep their imports, fonts and overlay sprites from one call to the next.
+  """
+
+  global image_pool
+
+  if image_pool is None:
+    image_pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context(worker_start_method))
+
+  return image_pool
+
+
+def closeImagePool():
+  """
+  closeImagePool()
+
+  Stops the worker processes started by openImagePool.
+  """
+
+  global image_pool
+
+  if image_pool is not None:
+    image_pool.shutdown()
+    image_pool = None
+
+  return
+
+
+def taskInputs(steps):
+  """
+  taskInputs(steps)
+
+  Returns the other images that are read by the steps (appendImage), in order.
+  """
+
+  names = []
+  for step in steps:
+    if step[0] == 'append':
+      if step[1] is not None:
+        names.append(step[1])
+      names += taskInputs(step[2])
+
+  return names
+
+
+def taskDigest(task):
+  """
+  taskDigest(task)
+
+  Returns the digest of the images an ImageTask reads and of its steps (stage_cache.stageDigest), or None if an image is missing.
+  """
+
+  return stageDigest([task.inName] + taskInputs(task.steps), (tuple(task.steps), image_backend, jpeg_quality))
+
+
+def runImageTasks(tasks, max_workers=None, cached=False):
+  """
+  runImageTasks(tasks, max_workers, cached)
+
+  Processes the images of all the tasks, max_workers at the same time (in separate processes). A task only starts once the tasks
+  writing the images in its after are done, and it is skipped if one of them failed.
+  Returns the number of images that were processed (or did not need to be) and the number of images that were not.
+
+  Parameters:
+  - tasks: list of ImageTask
+  - max_workers: number of images processed at the same time (None: one per CPU core); not used when the worker processes of
+                 openImagePool are running
+  - cached: if True, the images whose input images and steps are the same as when they were last written (stage_cache) are not
+            processed again
+  """
+
+  # a later task writing the same image replaces the earlier one (as the second of two convert calls would overwrite the image)
+  by_output = {}
+  for task in tasks:
+    by_output.pop(task.outName, None)
+    by_output[task.outName] = task
+
+  if max_workers is None:
+    max_workers = os.cpu_count() or 1
+
+  waiting = list(by_output.values())
+  finished, failed = set(), set()
+  running = {}
+  digests = {}
+  unchanged = 0
+  if len(waiting) > 0:
+    pool = image_pool
+    if pool is None:
+      pool = ProcessPoolExecutor(max_workers=min(max_workers, len(waiting)), mp_context=multiprocessing.get_context(worker_start_method))
+    try:
+      while len(waiting) > 0 or len(running) > 0:
+        # images that are not written by a task are expected to be there already
+        ready = [task for task in waiting if all(name in finished or name not in by_output for name in task.after)]
+        for task in ready:
+          waiting.remove(task)
+          if any(name in failed for name in task.after):
+            print('... ... Skipping ' + os.path.basename(task.outName) + ', an image it needs could not be processed.')
+            failed.add(task.outName)
+            finished.add(task.outName)
+            continue
+
+          # the images it needs are written by now, so its digest is the one of the images it will read
+          digests[task.outName] = taskDigest(task) if cached else None
+          if cached and isCurrent([task.outName], digests[task.outName]):
+            finished.add(task.outName)
+            unchanged += 1
+          else:
+            running[pool.submit(processTask, task, image_backend, convert_cmd)] = task
+
+        if len(running) == 0:
+          if len(ready) == 0:
+            for task in waiting:
+              print('... ... Skipping ' + os.path.basename(task.outName) + ', the images it needs are never written.')
+              failed.add(task.outName)
+            break
+          continue
+
+        done, pending = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+          task = running.pop(future)
+          try:
+            future.result()
+          except Exception as err:
+            print('... ... Could not process ' + os.path.basename(task.inName) + ': ' + str(err))
+            failed.add(task.outName)
+          finished.add(task.outName)
+          if cached:
+            rememberOutputs([task.outName], None if task.outName in failed else digests[task.outName])
+    finally:
+      if pool is not image_pool:
+        pool.shutdown()
+
+  if cached and unchanged > 0:
+    print('... ' + str(unchanged) + ' of ' + str(len(by_output)) + ' images did not change, and were not processed again.')
+
+  return len(by_output) - len(failed), len(failed)
+
+
+# # # IMAGEMAGICK BACKEND
+@lru_cache(maxsize=None)
+def convertOptions(steps, source):
+  """
+  convertOptions(steps, source)
+
+  Returns the ImageMagick options that do the steps, in order (without the input and output images).
+  They are only put together once for the steps of a product, and reused for all its images.
+
+  Parameters:
+  - steps: tuple of steps (crop, circle, resize, extent, annotate, appendImage)
+  - source: what to read for appendImage(None, ...) (e.g. mpr:source, the original image kept in memory)
+  """
+
+  options = []
+  gravity = 'NorthWest'
+  for step in steps:
+    # -gravity stays set for the rest of the command, but -annotate and -append expect the default (top left)
+    if step[0] in ['annotate', 'append'] and gravity != 'NorthWest':
+      options += ['-gravity', 'NorthWest']
+      gravity = 'NorthWest'
+
+    if step[0] == 'crop':
+      width, height, x, y = step[1:]
+      options += ['-crop', '{:d}x{:d}+{:d}+{:d}'.format(width, height, x, y), '+repage']
+
+    elif step[0] == 'circle':
+      xPt, yPt, marker_radius, fill, stroke = step[1:]
+      options += ['-fill', fill, '-stroke', stroke, '-draw', 'circle ' + str(xPt) + ',' + str(yPt) + ' ' + str(xPt+marker_radius) + ',' + str(yPt+marker_radius)]
+
+    elif step[0] == 'resize':
+      width, height = step[1:]
+      options += ['-resize', '{:d}x{:d}'.format(width, height)]
+
+    elif step[0] == 'extent':
+      width, height, background = step[1:]
+      options += ['-background', background, '-gravity', 'west', '-extent', '{:d}x{:d}'.format(width, height)]
+      gravity = 'west'
+
+    elif step[0] == 'annotate':
+      xPt, yPt, text, pointsize, fill = step[1:]
+      options += ['-fill', fill, '-stroke', 'none', '-pointsize', str(pointsize), '-annotate', '+' + str(xPt) + '+' + str(yPt), text]
+
+    elif step[0] == 'append':
+      fileName, other_steps, below = step[1:]
+      other = source if fileName is None else fileName
+      options += ['(', other] + list(convertOptions(other_steps, source)) + [')', '-background', 'white', '-append' if below else '+append']
+
+    else:
+      raise ValueError('Unknown image step: ' + str(step[0]))
+
+  return tuple(options)
+
+
+def convertArgs(inName, outName, steps):
+  """
+  convertArgs(inName, outName, steps)
+
+  Returns the arguments of the single ImageMagick call that reads inName, does all the steps, and writes outName
+  (e.g. convert in.png -crop 3000x2000+0+0 +repage -fill magenta ... -annotate +3000+1775 -110 ... out.png).
+
+  Parameters:
+  - inName: the complete path and name of the image to process (e.g. ./figs/imagename...)
+  - outName: the complete path and name of the processed image (e.g. ./figs_cropped/imagename...)
+  - steps: list of steps (crop, circle, resize, extent, annotate, appendImage)
+  """
+
+  cmd = list(convert_cmd) + [inName]
+  if os.path.splitext(inName)[1].lower() == '.gif':
+    cmd += ['-coalesce']
+
+  # the original image is kept in memory if an appended image is made from it again
+  if any(step[0] == 'append' and step[1] is None for step in steps):
+    cmd += ['-write', 'mpr:source']
+
+  cmd += list(convertOptions(tuple(steps), 'mpr:source'))
+
+  if os.path.splitext(outName)[1].lower() in ['.jpg', '.jpeg']:
+    cmd += ['-quality', str(jpeg_quality)]
+
+  return cmd + [outName]
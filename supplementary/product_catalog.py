@@ -0,0 +1,376 @@
+"""
+This module is the catalog of all the products downloaded by download_daily_images_all.py (and its _windows copy).
+
+Each product has a switch (the name used in switches_download.txt and switches_process.txt), a title that is printed,
+and a function that returns all its (url, image name) pairs for the forecast dates. buildJobs() goes through the
+catalog and returns the DownloadJobs of all the products that are switched on, so every image of the run is known
+before anything is downloaded.
+
+To add a product, write a function that returns its (url, image name) pairs and add it with addProduct, at the place
+in the catalog where it should be downloaded (the order is also the order of switches_process.txt).
+
+Required packages: collections, datetime, functools, math, os, download_tools (in this directory).
+
+
+Updates:
+ - 2026-10-18: Created from the per-product download blocks of download_daily_images_all.py.
+ - 2026-10-18: geosInitialTime, used as the key of the GEOS image url cache.
+ - 2026-10-18: The frames of an animation (image names with _anim_NN) are marked with the animation they belong to (animationName), so that runDownloads can check that all of them are on the website first.
+ - 2026-10-18: buildJobs can return the jobs of some of the switches only (only), for the watch mode of run_forecast_scripts.py.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import partial
+import math
+import os
+
+from download_tools import DownloadJob, find_geos_img_url
+
+
+# all the dates and settings the product urls depend on (set in download_daily_images_all.py)
+ForecastDates = namedtuple('ForecastDates', ['today', 'today_m', 'forecast_day1', 'forecast_day2', 'still_image_forecast_hr',
+                                             'nFrames_uwincm', 'model_day1', 'model_day2', 'dust_xLon', 'dust_xLat'])
+
+# switch: name of the switch (e.g. nhc_analysis)
+# title: printed when the product is queued for download
+# files: function(dates, switches) that returns a list of (url, image name) pairs
+Product = namedtuple('Product', ['switch', 'title', 'files'])
+
+catalog = []
+
+
+def addProduct(switch, title, files):
+  """
+  addProduct(switch, title, files)
+
+  Adds a product at the end of the catalog.
+
+  Parameters:
+  - switch: name of the switch (e.g. nhc_analysis)
+  - title: printed when the product is queued for download
+  - files: function(dates, switches) that returns a list of (url, image name) pairs
+  """
+
+  catalog.append(Product(switch, title, files))
+
+  return
+
+
+def modelDays(dates):
+  """
+  modelDays(dates)
+
+  Returns the (day name, forecast date) of the model days that are switched on (model_day1, model_day2).
+  """
+
+  days = []
+  if dates.model_day1:
+    days.append(('day1', dates.forecast_day1))
+  if dates.model_day2:
+    days.append(('day2', dates.forecast_day2))
+
+  return days
+
+
+def animationTimes(date, nFrames):
+  """
+  animationTimes(date, nFrames)
+
+  Returns the times of the animation frames for one model day: every other hour, starting at 01 UTC.
+  """
+
+  return [date + timedelta(hours=1) + timedelta(hours=2*frame) for frame in range(nFrames)]
+
+
+# # # OBSERVATIONS
+def nhcFiles(dates, switches):
+  return [('https://www.nhc.noaa.gov/tafb_latest/USA_latest.gif', 'NHC_surface_analysis.gif'),
+          ('https://www.nhc.noaa.gov/xgtwo/two_atl_2d0.png', 'NHC_2day_outlook.png'),
+          ('https://www.nhc.noaa.gov/xgtwo/two_atl_5d0.png', 'NHC_5day_outlook.png')]
+
+
+def mimicFiles(dates, switches):
+  return [('http://tropic.ssec.wisc.edu/real-time/mtpw2/webAnims/tpw_nrl_colors/natl/mimictpw_natl_latest.gif', 'MIMIC-TPW_24h_animation.gif')]
+
+
+satcorps_url = 'https://satcorps.larc.nasa.gov/prod/exp/cpex-aw-2020/satpng/'
+
+def goesFiles(dates, switches):
+  return [(satcorps_url + 'g16/latest/G16.LATEST.01KM.HVIS.PNG', 'Goes16_VIS.png'),
+          (satcorps_url + 'g16/latest/G16.LATEST.02KM.RGB.PNG', 'Goes16_RGB.png'),
+          (satcorps_url + 'g16/latest/G16.LATEST.02KM.IRC.PNG', 'Goes16_IRC.png')]
+
+
+def meteosatFiles(dates, switches):
+  return [(satcorps_url + 'met/latest/M11.LATEST.03KM.VIS.PNG', 'Meteosat11_VIS.png'),
+          (satcorps_url + 'met/latest/M11.LATEST.03KM.IRC.PNG', 'Meteosat11_IRC.png')]
+
+
+def brammerFiles(dates, switches):
+  init_date = datetime.strptime('2013-01-01', '%Y-%m-%d')
+  time_diff = int(math.ceil((dates.today-init_date).total_seconds()/3600))
+
+  # if the first time is not available, the second one is tried
+  url = 'http://www.atmos.albany.edu/student/abrammer/graphics/gfs_realtime/plots/prate_sf_mslp/ea_prate_sf_mslp_'
+  return [([url + str(time_diff) + '.0.jpg', url + str(time_diff+6) + '.0.jpg'], 'AEW_Brammer.jpg')]
+
+
+def salFiles(dates, switches):
+  return [('http://tropic.ssec.wisc.edu/real-time/sal/g16split/g16split.jpg', 'SAL_dryAir_split.jpg')]
+
+
+# # # MODEL STUFF - UWIN-CM, UofUtah, UC Davis (all on the UW orca website)
+orca_url = 'https://orca.atmos.washington.edu/model_images/atl/'
+
+# field: (path on the orca website, image name root)
+uwincm_fields = {'surfaceWind': ('large/windsfc/wspd.large.', 'uwincm_surfaceWind'),
+                 '650mbRH': ('large/rh650mb/650mb_rh.large.', 'uwincm_650mbRH'),
+                 'clouds': ('storm/pw_olr/pw_olr.storm.', 'uwincm_clouds'),
+                 'boundaryLayer': ('storm/blh/blh.storm.', 'uwincm_boundaryLayer'),
+                 'precipitation': ('storm/rr_slp/rainr.storm.', 'uwincm_precip')}
+
+
+def uwincmCurrentFiles(dates, switches):
+  # cloud map at forecast making time (run from two days ago)
+  url = orca_url + 'umcm_wmh/realtime/' + (dates.today - timedelta(days=2)).strftime('%Y%m%d') + '00/ecmwf/storm/pw_olr/pw_olr.storm.' + dates.today.strftime('%Y%m%d') + '10.jpg'
+  return [(url, 'uwincm_clouds_current.jpg')]
+
+
+def uwincmStillFiles(field, dates, switches):
+  path, root = uwincm_fields[field]
+  files = []
+  for day, date in modelDays(dates):
+    url = orca_url + 'umcm_wmh/realtime/' + dates.today_m.strftime('%Y%m%d') + '00/ecmwf/' + path + date.strftime('%Y%m%d') + '{:02d}'.format(dates.still_image_forecast_hr) + '.jpg'
+    files.append((url, root + '_' + day + '.jpg'))
+
+  return files
+
+
+def uwincmAnimationFiles(field, dates, switches):
+  path, root = uwincm_fields[field]
+  files = []
+  for day, date in modelDays(dates):
+    for frame, time in enumerate(animationTimes(date, dates.nFrames_uwincm)):
+      url = orca_url + 'umcm_wmh/realtime/' + dates.today_m.strftime('%Y%m%d') + '00/ecmwf/' + path + time.strftime('%Y%m%d%H') + '.jpg'
+      files.append((url, root + '_' + day + '_anim_' + '{:02d}'.format(frame) + '.jpg'))
+
+  return files
+
+
+def uutahStillFiles(dates, switches):
+  files = []
+  for day, date in modelDays(dates):
+    url = orca_url + 'uutah/realtime/' + dates.today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' + date.strftime('%Y-%m-%d') + '_' + '{:02d}'.format(dates.still_image_forecast_hr) + ':00:00_d02.png'
+    files.append((url, 'uutah_precip_' + day + '.jpg'))
+
+  return files
+
+
+def uutahAnimationFiles(dates, switches):
+  files = []
+  for day, date in modelDays(dates):
+    for frame, time in enumerate(animationTimes(date, dates.nFrames_uwincm)):
+      url = orca_url + 'uutah/realtime/' + dates.today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/slp_rain-' + time.strftime('%Y-%m-%d_%H:%M:%S') + '_d02.png'
+      files.append((url, 'uutah_precip_' + day + '_anim_' + '{:02d}'.format(frame) + '.png'))
+
+  return files
+
+
+def ucdavisAnimationFiles(dates, switches):
+  # forecast hours of the 12 UTC run: day 1 starts at 37 h, day 2 at 61 h
+  first_hour = {'day1': 36+1, 'day2': 60+1}
+  files = []
+  for day, date in modelDays(dates):
+    for frame in range(dates.nFrames_uwincm):
+      url = orca_url + 'ucdavis/realtime/' + dates.today_m.strftime('%Y%m%d') + '00/gfs/storm/rr_slp/SLP_Rainrate_' + dates.today_m.strftime('%Y%m%d') + '12_fcst_' + '{:02d}'.format(frame*2+first_hour[day]) + 'hr.d02.png'
+      files.append((url, 'ucdavis_precip_' + day + '_anim_' + '{:02d}'.format(frame) + '.png'))
+
+  return files
+
+
+def utahWebsiteFiles(dates, switches):
+  url = 'https://home.chpc.utah.edu/~pu/cpexaw/png/' + dates.today_m.strftime('%Y-%m-%d') + '_00/slp_rain-'
+  files = []
+  for frame in range(12):
+    for day, date in [('day1', dates.forecast_day1), ('day2', dates.forecast_day2)]:
+      time = date + timedelta(hours=1) + timedelta(hours=2*frame)
+      files.append((url + time.strftime('%Y-%m-%d_%H:%M:%S') + '_d02.png', 'uutah_precip_' + day + '_anim_' + '{:02d}'.format(frame) + '.png'))
+
+  return files
+
+
+# # # MODEL STUFF - MPAS, ECMWF (tropical tidbits)
+mpas_fields = ['pw_olr', 'rainr']
+
+def mpasFiles(dates, switches):
+  url = 'https://www2.mmm.ucar.edu/projects/real-time-forecasts/img/' + dates.today_m.strftime('%Y%m%d') + '12/UW/cpex_aw.'
+  files = []
+  for var in mpas_fields:
+    # day 3 (12 frames, from 85 h) and day 4 (6 frames, from 109 h) of the 12 UTC run
+    for day, nFrames, first_hour in [('day3', 12, 84+1), ('day4', 6, 108+1)]:
+      for frame in range(nFrames):
+        files.append((url + var + '.westafrica.init' + dates.today_m.strftime('%Y%m%d') + '12.fcst' + '{:03d}'.format(frame*2+first_hour) + 'hr.jpg',
+                      'mpas_' + var + '_' + day + '_anim_' + '{:02d}'.format(frame) + '.png'))
+
+  return files
+
+
+def icapFiles(dates, switches):
+  init = dates.today - timedelta(days=1)
+  url_base = 'https://www.nrlmry.navy.mil/aerosol/globaer/icap_01/subtropatl/' + init.strftime('%Y%m%d') + '00/' + init.strftime('%Y%m%d') + '00_'
+  files = []
+  for dy in [4, 5]:
+    valid = init + timedelta(days=dy)
+    dTime = int((valid - init).total_seconds()/3600)
+    files.append((url_base + valid.strftime('%Y%m%d%H') + '_f' + '{:03d}'.format(dTime) + '_total_aod_550_subtropatl_icap.png', 'ICAP_aerosol_ensemble_' + str(dTime) + '.png'))
+
+  return files
+
+
+ecmwf_fields = ['z700_vort','z850_vort']#,'mslp_pcpn']
+ecmwf_nFrames = 24
+
+def ecmwfFiles(dates, switches):
+  # 00Z initialization simulations
+  url_base = 'https://www.tropicaltidbits.com/analysis/models/ecmwf/' + dates.today.strftime('%Y%m%d') + '00/ecmwf_'
+  files = []
+  for vv in ecmwf_fields:
+    for idx in range(ecmwf_nFrames):
+      fileName = 'ECMWF_' + vv + '_anim_day3_' + '{:02d}'.format(idx) + '.png'
+      if vv == 'mslp_pcpn':
+        if idx > 0: files.append((url_base + vv + '_atl_' + str(idx) + '.png', fileName))
+      else:
+        files.append((url_base + vv + '_nafr_' + str(idx+1+24) + '.png', fileName))
+
+  return files
+
+
+# # # MODEL STUFF - NASA GEOS (the image urls have to be found on the FLUID pages)
+geos_img_url_pattern = '/missions/static//plots/'
+geos_req_timeout = (10, 300) #seconds (to connect, to wait for more data)
+geos_url_prefix = 'https://fluid.nccs.nasa.gov/missions/chem2d_mission%2BPRDUST/?one_click=1&'
+
+AOT_tau = ['012', '036', '060'] #Change tau to choose different lead hour
+AOT_tau_TOD = ['012', '036', '060','084', '108']
+wind_700mb_tau = ['084', '090', '096', '102', '108', '114', '120']
+#wind_700mb_tau = ['072', '078', '084', '090', '096', '102', '108', '114', '120', '126', '132', '138']
+
+day_suffix = ['', '_day1', '_day2', '_day3', '_day4']
+
+
+def geosInitialTime(dates):
+  """
+  geosInitialTime(dates)
+
+  Returns the initialization time of the GEOS run the images are taken from (12 UTC the day before today, e.g. 20220825T120000).
+  """
+
+  return dates.today_m.strftime('%Y%m%d') + 'T120000'
+
+
+def geosFiles(dates, switches):
+  fInitialTime = geosInitialTime(dates)
+  url_suffix = '&stream=G5FPFC&level=0&region=prdust&fcst=' + fInitialTime
+  chem2d = geos_url_prefix
+  weather = geos_url_prefix.replace('chem2d_mission', 'weather_mission')
+  custom = geos_url_prefix.replace('chem2d_mission', 'custom_mission')
+
+  # (mission page prefix, level suffix, field, lead hours, image names)
+  pages = [(chem2d, url_suffix, 'duaot', AOT_tau, ['GEOS_dust_aot' + sfx + '.png' for sfx in day_suffix[:3]]),
+           (chem2d, url_suffix, 'totaot', AOT_tau_TOD, ['GEOS_total_aot' + sfx + '.png' for sfx in day_suffix]),
+           (weather, url_suffix, 'cldlow', AOT_tau, ['GEOS_lowCloudFraction' + sfx + '.png' for sfx in day_suffix[:3]]),
+           (weather, url_suffix, 'cldmid', AOT_tau, ['GEOS_midCloudFraction' + sfx + '.png' for sfx in day_suffix[:3]]),
+           (weather, url_suffix, 'cldhgh', AOT_tau, ['GEOS_highCloudFraction' + sfx + '.png' for sfx in day_suffix[:3]])]
+
+  if switches['nasa_geos_cross_section']:
+    #lon and lat cross sections
+    pages.append((custom, url_suffix, 'du_w2', AOT_tau, ['GEOS_dust_aot' + sfx + '_vert_' + str(dates.dust_xLon) + 'N.png' for sfx in day_suffix[:3]]))
+    pages.append((custom, url_suffix, 'du_n1', AOT_tau, ['GEOS_dust_aot' + sfx + '_vert_' + str(dates.dust_xLat) + 'W.png' for sfx in day_suffix[:3]]))
+
+  #700 mb wind with geopotential heights
+  pages.append((weather, url_suffix.replace('level=0','level=700'), 'wspd', wind_700mb_tau, ['GEOS_700mb_outlook_anim_' + '{:02d}'.format(num) + '.png' for num in range(len(wind_700mb_tau))]))
+
+  files = []
+  for prefix, suffix, field, taus, names in pages:
+    for tau, name in zip(taus, names):
+      page = prefix + 'tau=' + tau + suffix + '&field=' + field
+      files.append((partial(find_geos_img_url, page, geos_img_url_pattern, geos_req_timeout), name))
+
+  return files
+
+
+# # # THE CATALOG (in download order)
+addProduct('nhc_analysis', 'NHC surface analysis and tropical weather 2-day and 5-day outlooks', nhcFiles)
+addProduct('mimic_tpw', 'MIMIC-TPW total precipitable water animation', mimicFiles)
+addProduct('GOES16_sat', 'GOES16 visible, RGB and IRC satellite imagery', goesFiles)
+addProduct('meteosat_sat', 'Meteosat-11 visible and IRC satellite imagery', meteosatFiles)
+addProduct('brammer_tropical_waves', "AEW analysis from Alan Brammer's Website", brammerFiles)
+addProduct('sal_split', 'dry air and dust image from CIMSS (split window)', salFiles)
+
+addProduct('uwincm_clouds_current', 'UWINCM cloud maps at forecast making time (08Z on current day)', uwincmCurrentFiles)
+addProduct('uwincm_surfaceWind', 'UWINCM surface wind map - single', partial(uwincmStillFiles, 'surfaceWind'))
+addProduct('uwincm_650mbRH', 'UWINCM 650mb moisture map - single', partial(uwincmStillFiles, '650mbRH'))
+addProduct('uwincm_clouds', 'UWINCM cloud map - single', partial(uwincmStillFiles, 'clouds'))
+addProduct('uwincm_boundaryLayer', 'UWINCM boundary layer map - single', partial(uwincmStillFiles, 'boundaryLayer'))
+addProduct('uwincm_precipitation', 'UWINCM precipitation map - single', partial(uwincmStillFiles, 'precipitation'))
+addProduct('uutah_precipitation', 'UofUtah model precipitation map - single', uutahStillFiles)
+
+addProduct('uwincm_surfaceWind_animation', 'UWINCM surface wind map - animation', partial(uwincmAnimationFiles, 'surfaceWind'))
+addProduct('uwincm_650mbRH_animation', 'UWINCM 650mb moisture map - animation', partial(uwincmAnimationFiles, '650mbRH'))
+addProduct('uwincm_clouds_animation', 'UWINCM cloud map - animation', partial(uwincmAnimationFiles, 'clouds'))
+addProduct('uwincm_precipitation_animation', 'UWINCM precipitation map - animation', partial(uwincmAnimationFiles, 'precipitation'))
+addProduct('uwincm_boundaryLayer_animation', 'UWINCM boundary layer map - animation', partial(uwincmAnimationFiles, 'boundaryLayer'))
+addProduct('uutah_precipitation_animation', 'UofUtah model precipitation map - animation', uutahAnimationFiles)
+addProduct('ucdavis_precipitation_animation', 'UofDavis model precipitation map - animation', ucdavisAnimationFiles)
+addProduct('UTAH_website', 'UofUtah model precipitation map from UTAH website', utahWebsiteFiles)
+addProduct('mpas_outlook', 'MPAS model pw_olr and rainr maps', mpasFiles)
+
+addProduct('icap_aerosol_ensemble', 'ICAP AOT ensemble mean maps for day 3 and day 5', icapFiles)
+addProduct('ECMWF_prediction', 'ECMWF from tropical tidbits - z700_vort, z850_vort', ecmwfFiles)
+addProduct('nasa_geos', 'images from GEOS - AOT, cloud fractions, cross sections and 700 mb wind', geosFiles)
+
+
+def animationName(fileName):
+  """
+  animationName(fileName)
+
+  Returns the animation a frame belongs to (the image name up to and including _anim_, e.g. uwincm_clouds_day1_anim_),
+  or None if the image is not an animation frame. create_animations.py only makes an animation if all its frames are there.
+  """
+
+  if '_anim_' not in fileName:
+    return None
+
+  return fileName[:fileName.index('_anim_') + len('_anim_')]
+
+
+def buildJobs(switches, dates, saveDir, only=None, verbose=True):
+  """
+  buildJobs(switches, dates, saveDir, only, verbose)
+
+  Goes through the catalog and returns the DownloadJobs for all the products that are switched on, in catalog order.
+
+  Parameters:
+  - switches: dictionary of True/False switches (from switches_download.txt)
+  - dates: ForecastDates with the dates and settings the urls depend on
+  - saveDir: the directory where the images are saved
+  - only: the switches whose jobs are returned (e.g. the products that changed on the website), None for all of them
+  - verbose: if True, the title and number of images of each product are printed
+  - jobs: returned list of DownloadJob(switch, url, imageName, animation)
+  """
+
+  jobs = []
+  for product in catalog:
+    if not switches.get(product.switch, False):
+      continue
+    if only is not None and product.switch not in only:
+      continue
+
+    files = product.files(dates, switches)
+    if verbose:
+      print('... Downloading ' + product.title + ' (' + str(len(files)) + ' images).')
+    for url, fileName in files:
+      jobs.append(DownloadJob(product.switch, url, os.path.join(saveDir, fileName), animationName(fileName)))
+
+  return jobs
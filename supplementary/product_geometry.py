@@ -0,0 +1,244 @@
+"""
+This module is the registry of how the images of each product are processed by crop_edit_daily_images.py (and its _windows copy).
+
+Each product is keyed by the part of the image names it covers (e.g. uwincm_clouds, GEOS_total_aot, mpas_rainr), and has the
+switches it is processed for, a title that is printed, the crop rectangle, the Sal marker, and the steps done after them
+(e.g. the Celsius IR scale of the satellite images). The steps of a product are put together once (productSteps), and
+the same steps are used for every image (frame) of the product.
+
+To add a product, add it with addGeometry, at the place in the registry where it should be processed. An image is processed
+by the first product that covers it, out of the ones that are switched on.
+
+Required packages: collections, os, image_tools (in this directory).
+
+
+Updates:
+ - 2026-10-18: Created from the per-product processing blocks of crop_edit_daily_images.py.
+ - 2026-10-18: Added switchGroups (the switches that have to be processed together, for run_forecast_scripts.py).
+ - 2026-10-18: Products can write their processed images under another name (rename), used for the two-digit MIMIC-TPW frame numbers (mimicFrameName).
+"""
+
+from collections import namedtuple
+import os
+
+from image_tools import ImageTask, annotate, appendImage, circle, crop, extent, resize
+
+
+# prefix: the part of the image names the product covers (e.g. uwincm_clouds), also its key in the registry
+# switches: the product is processed if any of these switches is True
+# title: printed when the images of the product are queued for processing
+# crop: crop rectangle (e.g. 740x450+25+110), or None to keep the whole image
+# marker: the Sal marker (a circle step), or None
+# steps: steps done after the crop and the marker (e.g. resize, extent, annotate, appendImage)
+# match: function(fileName) that returns True for the images of the product, or None if all images with prefix in their name are
+# rename: function(fileName) that returns the name of the processed image, or None to keep the name
+ProductGeometry = namedtuple('ProductGeometry', ['prefix', 'switches', 'title', 'crop', 'marker', 'steps', 'match', 'rename'])
+
+registry = {}
+
+# prefix -> steps of the product, put together the first time they are needed
+compiled = {}
+
+# labels of the Celsius IR color scale (text, y position), added on the right of the Meteosat and GOES IRC images
+ir_scale_labels = [('-110', 1775), ('-90', 1577), ('-70', 1395), ('-50', 1215), ('-30', 1035), ('-10', 855), (' 10', 675), (' 30', 495), (' 50', 315), ('ºC', 245)]
+
+
+def addGeometry(prefix, switches, title, crop=None, marker=None, steps=[], match=None, rename=None):
+  """
+  addGeometry(prefix, switches, title, crop, marker, steps, match, rename)
+
+  Adds a product at the end of the registry.
+
+  Parameters:
+  - prefix: the part of the image names the product covers (e.g. uwincm_clouds)
+  - switches: list of switches, the product is processed if any of them is True
+  - title: printed when the images of the product are queued for processing
+  - crop: crop rectangle (e.g. 740x450+25+110), or None to keep the whole image
+  - marker: the Sal marker (e.g. circle(448, 172, 5, 'white')), or None
+  - steps: steps done after the crop and the marker
+  - match: function(fileName) that returns True for the images of the product (None: prefix is in the image name)
+  - rename: function(fileName) that returns the name of the processed image (None: same name as the downloaded image)
+  """
+
+  registry[prefix] = ProductGeometry(prefix, tuple(switches), title, crop, marker, tuple(steps), match, rename)
+
+  return
+
+
+def irScale(xPt, width, height):
+  """
+  irScale(xPt, width, height)
+
+  Returns the steps that add the Celsius IR color scale on the right of a satellite image: the image is padded to width x height
+  with white, and the labels are written at xPt.
+  """
+
+  return [resize(width, height), extent(width, height)] + [annotate(xPt, yPt, label) for label, yPt in ir_scale_labels]
+
+
+def productSteps(prefix):
+  """
+  productSteps(prefix)
+
+  Returns the steps of a product (crop, marker, then the other steps), put together once and reused for all its images.
+  """
+
+  if prefix not in compiled:
+    geometry = registry[prefix]
+    steps = []
+    if geometry.crop is not None:
+      steps.append(crop(geometry.crop))
+    if geometry.marker is not None:
+      steps.append(geometry.marker)
+    compiled[prefix] = tuple(steps) + geometry.steps
+
+  return compiled[prefix]
+
+
+def mimicFrameName(fileName):
+  """
+  mimicFrameName(fileName)
+
+  Returns the name of a processed MIMIC-TPW animation frame, with a two-digit frame number (e.g. MIMIC-TPW_24h_animation-3.png becomes
+  MIMIC-TPW_24h_animation-03.png), so that the frames sort in order. Other MIMIC-TPW images keep their name.
+  """
+
+  if 'animation-' not in fileName:
+    return fileName
+
+  frame_number = int(fileName.split('-')[-1].split('.')[0])
+  return fileName[:24] + '{:02d}'.format(frame_number) + fileName[-4:]
+
+
+def matchesGeometry(geometry, fileName):
+  """
+  matchesGeometry(geometry, fileName)
+
+  Returns True if the image fileName belongs to the product.
+  """
+
+  if geometry.match is None:
+    return geometry.prefix in fileName
+
+  return geometry.match(fileName)
+
+
+def switchGroups(joined=[]):
+  """
+  switchGroups(joined)
+
+  Returns the switches of the registry in groups that are processed together: the switches of a product are in the same group (e.g.
+  uwincm_clouds, uwincm_clouds_current and uwincm_clouds_animation all process the uwincm_clouds images), as are the joined switches.
+
+  Parameters:
+  - joined: lists of switches whose images are also put together (e.g. [['meteosat_sat', 'GOES16_sat']] for the joint IRC image)
+  """
+
+  groups = []
+  for switches in [geometry.switches for geometry in registry.values()] + [tuple(group) for group in joined]:
+    group = set(switches)
+    for other in [other for other in groups if len(other & group) > 0]:
+      group |= other
+      groups.remove(other)
+    groups.append(group)
+
+  return [sorted(group) for group in groups]
+
+
+def buildTasks(switches, fileNames, saveDir, cropDir):
+  """
+  buildTasks(switches, fileNames, saveDir, cropDir)
+
+  Goes through the registry and returns the ImageTasks of all the images that belong to a product that is switched on.
+
+  Parameters:
+  - switches: dictionary of True/False switches (from switches_process.txt)
+  - fileNames: the names of the downloaded images (in saveDir)
+  - saveDir: the directory of the downloaded images
+  - cropDir: the directory where the processed images are written
+  """
+
+  tasks = []
+  queued = set()
+  for prefix, geometry in registry.items():
+    if not any(switches.get(switch, False) for switch in geometry.switches):
+      continue
+
+    current_files = [fl for fl in fileNames if fl not in queued and matchesGeometry(geometry, fl)]
+    if len(current_files) == 0:
+      continue
+
+    print('... ' + geometry.title + ' (' + str(len(current_files)) + ' images).')
+    steps = productSteps(prefix)
+    for fl in current_files:
+      outName = fl if geometry.rename is None else geometry.rename(fl)
+      tasks.append(ImageTask(os.path.join(saveDir,fl), os.path.join(cropDir,outName), steps))
+      queued.add(fl)
+
+  return tasks
+
+
+# # # THE REGISTRY (in processing order)
+addGeometry('NHC_surface_analysis', ['nhc_analysis'], 'NHC analysis - cropping image and adding Sal location',
+            crop='1268x648+1100+350', marker=circle(952, 445, 5, 'red'), match=lambda fl: 'NHC_surface_analysis.png' in fl)
+addGeometry('NHC_', ['nhc_analysis'], 'NHC tropical weather outlooks - cropping image and adding Sal location',
+            crop='900x665+0+0', marker=circle(775, 445, 5, 'blue'), match=lambda fl: 'NHC_' in fl and 'surface_analysis' not in fl)
+addGeometry('MIMIC-TPW', ['mimic_tpw'], 'MIMIC-TPW - cropping image and adding Sal location',
+            crop='990x452+8+18', marker=circle(665, 323, 4, 'white'), rename=mimicFrameName)
+addGeometry('Brammer', ['brammer_tropical_waves'], 'Tropical wave analysis - cropping image and adding Sal location',
+            crop='990x388+10+0', marker=circle(662, 243, 4, 'red'))
+# the color bar is cropped off the original image, made larger, and joined below the image
+addGeometry('SAL_dryAir_split', ['sal_split'], 'SAL dust split image - cropping image, adding Sal location and a larger color bar',
+            crop='1312x780+230+0', marker=circle(1120, 488, 6, 'white'),
+            steps=[appendImage(steps=[crop('682x38+430+782'), resize(1312, 73)], below=True)])
+
+addGeometry('Meteosat11_IRC', ['meteosat_sat'], 'Meteosat-11 color IR - cropping image, adding Sal location and a Celsius IR scale',
+            crop='3000x2000+0+0', marker=circle(850, 910, 12, 'magenta'), steps=irScale(3000, 3100, 2000),
+            match=lambda fl: 'Meteosat' in fl and 'IRC' in fl)
+addGeometry('Meteosat', ['meteosat_sat'], 'Meteosat-11 - cropping image and adding Sal location',
+            crop='3000x2000+0+0', marker=circle(850, 910, 12, 'magenta'))
+# the GOES-16 RGB image is not processed
+addGeometry('Goes16_IRC', ['GOES16_sat'], 'GOES-16 color IR - cropping image, adding St. Croix location and a Celsius IR scale',
+            crop='2000x2000+0+0', marker=circle(1340, 940, 12, 'magenta'), steps=irScale(2000, 2100, 2000),
+            match=lambda fl: 'Goes16' in fl and 'IRC' in fl)
+addGeometry('Goes16_VIS', ['GOES16_sat'], 'GOES-16 visible - cropping image and adding St. Croix location',
+            crop='3712x3700+0+0', marker=circle(940, 1560, 24, 'magenta'), match=lambda fl: 'Goes16' in fl and 'VIS' in fl)
+
+addGeometry('uwincm_clouds', ['uwincm_clouds_animation', 'uwincm_clouds_current', 'uwincm_clouds'], 'UWIN-CM - clouds and TPW - cropping image and adding Sal location',
+            crop='740x450+25+110', marker=circle(448, 172, 5, 'white'))
+addGeometry('uwincm_boundaryLayer', ['uwincm_boundaryLayer', 'uwincm_boundaryLayer_animation'], 'UWIN-CM - boundary layer - cropping image and adding Sal location',
+            crop='740x450+25+110', marker=circle(454, 171, 5, 'red'))
+addGeometry('uwincm_precip', ['uwincm_precipitation', 'uwincm_precipitation_animation'], 'UWIN-CM - precipitation - cropping image and adding Sal location',
+            crop='740x500+25+110', marker=circle(454, 171, 5, 'black', stroke='red'))
+addGeometry('uutah_precip', ['uutah_precipitation', 'uutah_precipitation_animation', 'UTAH_website'], 'University of Utah - precipitation - adding Sal location',
+            marker=circle(452, 187, 5, 'black', stroke='red'))
+addGeometry('ucdavis_precip', ['ucdavis_precipitation_animation'], 'UC Davis - precipitation - adding Sal location',
+            marker=circle(422, 163, 5, 'black', stroke='red'))
+addGeometry('uwincm_surfaceWind', ['uwincm_surfaceWind', 'uwincm_surfaceWind_animation'], 'UWIN-CM - surface winds - cropping image and adding Sal location',
+            crop='740x450+30+85', marker=circle(542, 234, 4, 'white'))
+addGeometry('uwincm_650mbRH', ['uwincm_650mbRH', 'uwincm_650mbRH_animation'], 'UWIN-CM - 650mb RH - cropping image and adding Sal location',
+            crop='740x450+30+85', marker=circle(542, 234, 4, 'red', stroke='white'))
+
+addGeometry('ICAP', ['icap_aerosol_ensemble'], 'ICAP aerosol ensemble - cropping image and adding Sal location',
+            crop='825x530+80+85', marker=circle(490, 334, 4, 'red'))
+addGeometry('ECMWF_z700_vort_anim', ['ECMWF_prediction'], 'ECMWF outlook - 700 mb vorticity - cropping image and adding Sal location',
+            crop='971x547+0+0', marker=circle(235, 325, 4, 'red'))
+addGeometry('ECMWF_z850_vort_anim', ['ECMWF_prediction'], 'ECMWF outlook - 850 mb vorticity - adding Sal location',
+            marker=circle(235, 325, 4, 'red'))
+addGeometry('mpas_rainr', ['mpas_outlook'], 'MPAS outlook - precipitation - cropping image and adding Sal location',
+            crop='780x400+0+115', marker=circle(402, 98, 4, 'red'))
+addGeometry('mpas_pw_olr', ['mpas_outlook'], 'MPAS outlook - TPW - cropping image and adding Sal location',
+            crop='780x400+0+115', marker=circle(402, 98, 4, 'red'))
+
+addGeometry('GEOS_700mb_outlook', ['nasa_geos'], 'NASA GEOS - 700 mb winds - cropping image and adding Sal location',
+            crop='984x688+0+80', marker=circle(685, 335, 5, 'red'))
+addGeometry('GEOS_dust', ['nasa_geos'], 'NASA GEOS - dust AOT - cropping image and adding Sal location',
+            crop='984x688+0+80', marker=circle(685, 335, 5, 'white'), match=lambda fl: 'GEOS_dust' in fl and 'vert' not in fl)
+addGeometry('GEOS_dust_vert_N', ['nasa_geos'], 'NASA GEOS - dust cross section along a latitude - cropping image and adding Sal location',
+            crop='1021x654+2+57', marker=circle(750, 619, 8, 'white'), match=lambda fl: 'GEOS_dust' in fl and 'N.png' in fl)
+addGeometry('GEOS_dust_vert_W', ['nasa_geos'], 'NASA GEOS - dust cross section along a longitude - cropping image and adding Sal location',
+            crop='1019x681+0+57', marker=circle(495, 619, 8, 'white'), match=lambda fl: 'GEOS_dust' in fl and 'W.png' in fl)
+addGeometry('GEOS_total_aot', ['nasa_geos'], 'NASA GEOS - total AOT - cropping image and adding Sal location',
+            crop='984x688+0+80', marker=circle(685, 335, 5, 'blue'))
+addGeometry('GEOS_CloudFraction', ['nasa_geos'], 'NASA GEOS - cloud fractions - cropping image and adding Sal location',
+            crop='984x688+0+80', marker=circle(685, 335, 5, 'red'), match=lambda fl: 'GEOS_' in fl and 'CloudFraction' in fl)
@@ -1,8 +1,9 @@
-from PIL import Image
 import os
 import subprocess
 import time
 
+from animation_tools import animateFiles, frameDurations, loadFrames, writeVideo
+
 
 
 
@@ -12,62 +13,30 @@ dat ='2022090112'
 
 
 # For creating gif
+# (each frame is read once, as it is written to the animation, and the last frame is shown 3 frames longer)
 var=['RH650mb_V650mb','V10m']
 for vv in var:
 # Day 1
-    images=[]
-    for num in range(37,37+24,2):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') ))
-    for rep in range(3):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') ))
-        images[0].save( os.path.join(dir_save,vv+'_day1.gif'), save_all=True, append_images=images[1:], optimize=False, duration=500, loop=0)
+    fls = [os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') for num in range(37,37+24,2)]
+    animateFiles(fls, os.path.join(dir_save,vv+'_day1.gif'), delay=500, nDup=3)
 # Day 2
-    images=[]
-    for num in range(61,61+24,2):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') ))
-    for rep in range(3):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') ))
-        images[0].save( os.path.join(dir_save,vv+'_day2.gif'), save_all=True, append_images=images[1:], optimize=False, duration=500, loop=0)
+    fls = [os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.png') for num in range(61,61+24,2)]
+    animateFiles(fls, os.path.join(dir_save,vv+'_day2.gif'), delay=500, nDup=3)
 
 
 var=['TPW_OLR','PBLH','SLP_Rainrate']
 for vv in var:
 # Day 1
-    images=[]
-    for num in range(37,37+24,2):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') ))
-    for rep in range(3):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') ))
-        images[0].save( os.path.join(dir_save,vv+'_day1.gif'), save_all=True, append_images=images[1:], optimize=False, duration=500, loop=0)
+    fls = [os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') for num in range(37,37+24,2)]
+    animateFiles(fls, os.path.join(dir_save,vv+'_day1.gif'), delay=500, nDup=3)
 # Day 2
-    images=[]
-    for num in range(61,61+24,2):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') ))
-    for rep in range(3):
-        images.append(Image.open( os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') ))
-        images[0].save( os.path.join(dir_save,vv+'_day2.gif'), save_all=True, append_images=images[1:], optimize=False, duration=500, loop=0)
+    fls = [os.path.join(dir_file,vv+'_'+dat+'_fcst_'+"{:02d}".format(num)+'hr.d02.png') for num in range(61,61+24,2)]
+    animateFiles(fls, os.path.join(dir_save,vv+'_day2.gif'), delay=500, nDup=3)
 
 
 # for creating Videos
+# (all the d02 images of var, 5 frames per second, read one at a time like the .gif frames; H.264 if cv2 has it, else MPEG-4)
 
-import cv2
-import os
-
-image_folder = dir_file
 var='SLP_Rainrate'
-video_name = os.path.join(dir_save,var+'.mp4')
-
-imag = [img for img in sorted(os.listdir(image_folder)) if var in img]
-images = [img for img in imag if 'd02' in img]
-frame = cv2.imread(os.path.join(image_folder, images[0]))
-height, width, layers = frame.shape
-fps = 5
-
-self_fourcc = cv2.VideoWriter_fourcc(*'MP4V')
-video = cv2.VideoWriter(video_name, self_fourcc, fps, (width,height))
-
-for image in images:
-    video.write(cv2.imread(os.path.join(image_folder, image)))
-
-cv2.destroyAllWindows()
-video.release()
+fls = [os.path.join(dir_file,img) for img in sorted(os.listdir(dir_file)) if var in img and 'd02' in img]
+writeVideo(loadFrames(fls), frameDurations(len(fls), delay=200, nDup=0), os.path.join(dir_save,var+'.mp4'), delay=200)
@@ -0,0 +1,182 @@
+"""
+This module remembers what each processed image and movie was made from, for crop_edit_daily_images.py and create_animations.py
+(and their _windows copies).
+
+For every output (e.g. ./figs_cropped/NHC_surface_analysis.png or a joint movie), the cache keeps a digest of its inputs: the SHA-256
+of the content of every image it is made from, and a digest of its recipe (the steps, the movie settings, the backend). When the
+same output is asked for again with the same digest, and the output is still the file that was written then (same size and
+modification time), it is not made again. An image that was downloaded again but did not change, therefore does not get cropped
+again, and a joint movie is only written again when one of its frames changed.
+
+The cache is kept in memory for the whole run (run_forecast_scripts.py runs all the steps in one process), and saved to a small
+json file between runs (loadStageCache/saveStageCache).
+
+Required packages: hashlib, json, os, threading.
+
+
+Updates:
+ - 2026-10-18: Created.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+
+digest_block = 1024*1024 # bytes read at a time when an image is hashed
+
+# output (complete path and name) -> {'digest': digest of its inputs and recipe, 'size': size, 'mtime': modification time (ns)}
+stage_cache = {}
+stage_cache_file = None
+stage_lock = threading.Lock()
+
+# complete path and name -> (size, modification time (ns), SHA-256 of the content), so an image is only hashed once per version
+file_digests = {}
+
+
+def loadStageCache(cacheFile):
+  """
+  loadStageCache(cacheFile)
+
+  Reads the digests saved by a previous run. A missing or unreadable file starts an empty cache. Nothing is read if the cache
+  was already loaded from the same file in this process (it is then more recent than the file).
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.stage_cache.json)
+  """
+  global stage_cache, stage_cache_file
+
+  with stage_lock:
+    if stage_cache_file == os.path.abspath(cacheFile):
+      return
+
+  try:
+    with open(cacheFile, 'r') as fl:
+      cache = json.load(fl)
+  except (OSError, ValueError):
+    cache = {}
+
+  with stage_lock:
+    stage_cache = cache
+    stage_cache_file = os.path.abspath(cacheFile)
+
+  return
+
+
+def saveStageCache(cacheFile):
+  """
+  saveStageCache(cacheFile)
+
+  Writes the digests of the outputs, so the next run can skip the ones whose inputs did not change.
+
+  Parameters:
+  - cacheFile: the complete path and name of the cache file (e.g. ./figs/.stage_cache.json)
+  """
+
+  with stage_lock:
+    data = json.dumps(stage_cache, indent=1, sort_keys=True)
+
+  with open(cacheFile + '.tmp', 'w') as fl:
+    fl.write(data)
+  os.replace(cacheFile + '.tmp', cacheFile)
+
+  return
+
+
+def fileDigest(fileName):
+  """
+  fileDigest(fileName)
+
+  Returns the SHA-256 of the content of the file (hex), or None if it is not there.
+  """
+
+  try:
+    info = os.stat(fileName)
+  except OSError:
+    return None
+
+  path = os.path.abspath(fileName)
+  with stage_lock:
+    known = file_digests.get(path)
+  if known is not None and known[:2] == (info.st_size, info.st_mtime_ns):
+    return known[2]
+
+  digest = hashlib.sha256()
+  with open(fileName, 'rb') as fl:
+    for block in iter(lambda: fl.read(digest_block), b''):
+      digest.update(block)
+
+  with stage_lock:
+    file_digests[path] = (info.st_size, info.st_mtime_ns, digest.hexdigest())
+
+  return digest.hexdigest()
+
+
+def stageDigest(inputs, recipe):
+  """
+  stageDigest(inputs, recipe)
+
+  Returns the digest of an output made from the files in inputs with recipe, or None if one of the inputs is not there.
+
+  Parameters:
+  - inputs: the complete paths and names of the files the output is made from, in order
+  - recipe: everything else the output depends on (e.g. the list of steps); its repr is hashed, so it has to be made of plain values
+  """
+
+  digest = hashlib.sha256(repr(recipe).encode('utf-8'))
+  for fileName in inputs:
+    content = fileDigest(fileName)
+    if content is None:
+      return None
+    digest.update(('\n' + os.path.basename(fileName) + ' ' + content).encode('utf-8'))
+
+  return digest.hexdigest()
+
+
+def isCurrent(outNames, digest):
+  """
+  isCurrent(outNames, digest)
+
+  Returns True if all the outputs were made with this digest, and are still the files that were written then.
+
+  Parameters:
+  - outNames: the complete paths and names of the outputs (e.g. a movie and its videos)
+  - digest: stageDigest of the inputs and recipe (None is never current)
+  """
+
+  if digest is None:
+    return False
+
+  for outName in outNames:
+    with stage_lock:
+      entry = stage_cache.get(os.path.abspath(outName))
+    if entry is None or entry.get('digest') != digest:
+      return False
+    try:
+      info = os.stat(outName)
+    except OSError:
+      return False
+    if info.st_size != entry.get('size') or info.st_mtime_ns != entry.get('mtime'):
+      return False
+
+  return True
+
+
+def rememberOutputs(outNames, digest):
+  """
+  rememberOutputs(outNames, digest)
+
+  Keeps the digest the outputs were just made with (the outputs that were not written are forgotten).
+  """
+
+  for outName in outNames:
+    path = os.path.abspath(outName)
+    with stage_lock:
+      if digest is None or not os.path.isfile(outName):
+        stage_cache.pop(path, None)
+        continue
+      info = os.stat(outName)
+      stage_cache[path] = {'digest': digest, 'size': info.st_size, 'mtime': info.st_mtime_ns}
+
+  return
@@ -0,0 +1,159 @@
+"""
+This module runs the steps of the forecast template (e.g. the download of one product, cropping its images, making its movie) as a task graph,
+for run_forecast_scripts.py.
+
+Each step is a GraphNode, with the steps it needs (after). A step is started as soon as all the steps it needs are done, so the steps of
+different products overlap (e.g. the NHC images are cropped while the UWIN-CM frames are still downloading), instead of every stage
+waiting for the whole previous stage. Steps that use all the CPU cores (resource 'cpu') are run one at a time.
+
+At the end, the critical path is printed: the chain of steps that each waited for the one before it, up to the step that finished last.
+It is the part of the run that has to get faster for the whole run to get faster.
+
+Required packages: collections, concurrent.futures, threading, time.
+
+
+Updates:
+ - 2026-10-18: Created.
+"""
+
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+
+# name: unique name of the step (e.g. crop:nhc_analysis)
+# run: function() that does the step, and returns True if it worked (the steps after a step that did not work are skipped)
+# after: names of the steps that have to be done first
+# resource: steps with the same resource share its limit (runGraph limits), None for no limit
+# skip: if True, the step is skipped when a step it needs did not work (False: it is run once they are all done, e.g. moving the final images that are there)
+GraphNode = namedtuple('GraphNode', ['name', 'run', 'after', 'resource', 'skip'], defaults=[(), None, True])
+
+# ok: True if the step worked (False if it did not, None if it was skipped)
+# start, end: time (time.time()) the step started and ended
+NodeResult = namedtuple('NodeResult', ['ok', 'start', 'end'])
+
+
+def runNode(node, limit):
+  """
+  runNode(node, limit)
+
+  Runs a step (once its resource is free), and returns its NodeResult. An exception counts as a step that did not work.
+  """
+
+  if limit is not None:
+    limit.acquire()
+  try:
+    start = time.time()
+    try:
+      ok = bool(node.run())
+    except Exception as err:
+      print('... ' + node.name + ' failed: ' + str(err))
+      ok = False
+    return NodeResult(ok, start, time.time())
+  finally:
+    if limit is not None:
+      limit.release()
+
+
+def runGraph(nodes, limits={}, max_workers=None):
+  """
+  runGraph(nodes, limits, max_workers)
+
+  Runs all the steps, each one as soon as the steps it needs are done. The steps after a step that did not work are skipped (unless their skip is False).
+  Returns a dictionary with the NodeResult of every step.
+
+  Parameters:
+  - nodes: list of GraphNodes
+  - limits: number of steps with a resource that may run at the same time (e.g. {'cpu': 1})
+  - max_workers: number of steps running (or waiting for their resource) at the same time (None: all of them)
+  """
+
+  names = set(node.name for node in nodes)
+  for node in nodes:
+    for name in node.after:
+      if name not in names:
+        raise ValueError(node.name + ' needs ' + name + ', which is not a step')
+
+  semaphores = {resource: threading.BoundedSemaphore(limit) for resource, limit in limits.items()}
+  results = {}
+  waiting = list(nodes)
+  running = {}
+
+  with ThreadPoolExecutor(max_workers=max_workers or max(1, len(nodes))) as pool:
+    while len(waiting) > 0 or len(running) > 0:
+      for node in list(waiting):
+        if node.skip and any(results.get(name) is not None and results[name].ok != True for name in node.after):
+          now = time.time()
+          print('... Skipping ' + node.name + ', a step it needs did not work.')
+          results[node.name] = NodeResult(None, now, now)
+          waiting.remove(node)
+        elif all(name in results for name in node.after):
+          running[pool.submit(runNode, node, semaphores.get(node.resource))] = node
+          waiting.remove(node)
+
+      if len(running) == 0:
+        if len(waiting) > 0:
+          raise ValueError('The steps ' + ', '.join(node.name for node in waiting) + ' need each other')
+        break
+
+      done, pending = wait(list(running), return_when=FIRST_COMPLETED)
+      for future in done:
+        node = running.pop(future)
+        results[node.name] = future.result()
+
+  return results
+
+
+def criticalPath(nodes, results):
+  """
+  criticalPath(nodes, results)
+
+  Returns the names of the steps on the critical path, in order: starting from the step that finished last, the step it waited for
+  the longest (the one of the steps it needs that finished last), and so on.
+
+  Parameters:
+  - nodes: list of GraphNodes
+  - results: the results of runGraph
+  """
+
+  after = {node.name: node.after for node in nodes}
+  done = [name for name in results if results[name].ok is not None]
+  if len(done) == 0:
+    return []
+
+  path = [max(done, key=lambda name: results[name].end)]
+  while True:
+    needed = [name for name in after[path[-1]] if name in done]
+    if len(needed) == 0:
+      break
+    path.append(max(needed, key=lambda name: results[name].end))
+
+  return path[::-1]
+
+
+def printCriticalPath(nodes, results):
+  """
+  printCriticalPath(nodes, results)
+
+  Prints the steps on the critical path, with how long each one took and how long it waited after the step before it (e.g. for the CPU).
+  """
+
+  path = criticalPath(nodes, results)
+  if len(path) == 0:
+    return
+
+  start = min(result.start for result in results.values())
+  print('Critical path (' + '{:.1f}'.format(results[path[-1]].end - start) + ' s):')
+  previous_end = start
+  for name in path:
+    result = results[name]
+    line = '... ' + name + ': ' + '{:.1f}'.format(result.end - result.start) + ' s'
+    if result.start - previous_end >= 0.1:
+      line += ' (started ' + '{:.1f}'.format(result.start - previous_end) + ' s after the step before it)'
+    if result.ok != True:
+      line += ' - did not work'
+    print(line)
+    previous_end = result.end
+
+  return
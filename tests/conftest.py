@@ -0,0 +1,8 @@
+"""
+The modules of ./supplementary/ import each other by name (they are run from that directory), so it is put on the path for the tests.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'supplementary'))
@@ -0,0 +1,60 @@
+"""
+Tests of animation_tools.animateFiles.
+"""
+
+import pytest
+
+from animation_tools import animateFiles, frameDurations
+
+Image = pytest.importorskip('PIL.Image')
+ImageSequence = pytest.importorskip('PIL.ImageSequence')
+
+
+def writeFrames(directory, colors):
+  fileNames = []
+  for num, color in enumerate(colors):
+    fileName = str(directory / ('frame_anim_' + '{:02d}'.format(num) + '.png'))
+    Image.new('RGB', (32, 24), color).save(fileName)
+    fileNames.append(fileName)
+  return fileNames
+
+
+def gifFrames(fileName):
+  with Image.open(fileName) as img:
+    return [(frame.info['duration'], frame.convert('RGB').getpixel((0, 0))) for frame in ImageSequence.Iterator(img)], img.info.get('loop')
+
+
+def test_frameDurations():
+  assert frameDurations(0) == []
+  assert frameDurations(1, delay=500, nDup=3) == [2000]
+  assert frameDurations(4, delay=200, nDup=2) == [200, 200, 200, 600]
+
+
+def test_animateFiles_frames_and_durations(tmp_path):
+  fileNames = writeFrames(tmp_path, ['red', 'green', 'blue'])
+  outName = str(tmp_path / 'movie.gif')
+
+  assert animateFiles(fileNames, outName, delay=500, nDup=3, loop=0)
+
+  frames, loop = gifFrames(outName)
+  assert [duration for duration, color in frames] == [500, 500, 2000]
+  assert [color for duration, color in frames] == [(255, 0, 0), (0, 128, 0), (0, 0, 255)]
+  assert loop == 0
+
+
+def test_animateFiles_optimize(tmp_path):
+  fileNames = writeFrames(tmp_path, ['red', 'red', 'blue', 'white'])
+  outName = str(tmp_path / 'movie.gif')
+
+  assert animateFiles(fileNames, outName, delay=100, nDup=1, optimize=True)
+
+  # a frame that is the same as the one before is still its own frame, so the timing does not change
+  frames, loop = gifFrames(outName)
+  assert frames == [(100, (255, 0, 0)), (100, (255, 0, 0)), (100, (0, 0, 255)), (200, (255, 255, 255))]
+
+
+def test_animateFiles_no_formats(tmp_path):
+  fileNames = writeFrames(tmp_path, ['red'])
+
+  assert not animateFiles(fileNames, str(tmp_path / 'movie.gif'), formats=[])
+  assert not (tmp_path / 'movie.gif').exists()
@@ -0,0 +1,84 @@
+"""
+Tests of image_tools.py.
+"""
+
+import sys
+
+import pytest
+
+import image_tools
+from image_tools import appendImage, circle, convertArgs, crop, processImage, resize, setBackend
+
+
+@pytest.fixture
+def backend(monkeypatch):
+  # setBackend changes the module settings, they are put back after each test
+  monkeypatch.setattr(image_tools, 'image_backend', image_tools.image_backend)
+  monkeypatch.setattr(image_tools, 'convert_cmd', list(image_tools.convert_cmd))
+  return setBackend
+
+
+def test_convertArgs_one_call(backend):
+  backend('convert', ['convert'])
+
+  cmd = convertArgs('in.gif', 'out.jpg', [crop('740x450+25+110'), circle(448, 172, 5, 'white')])
+
+  assert cmd == ['convert', 'in.gif', '-coalesce', '-crop', '740x450+25+110', '+repage', '-fill', 'white', '-stroke', 'black',
+                 '-draw', 'circle 448,172 453,177', '-quality', str(image_tools.jpeg_quality), 'out.jpg']
+
+
+def test_convertArgs_append(backend):
+  backend('convert', ['magick', 'convert'])
+
+  cmd = convertArgs('in.png', 'out.png', [appendImage(steps=[crop('682x38+430+782'), resize(1312, 73)], below=True)])
+
+  assert cmd == ['magick', 'convert', 'in.png', '-write', 'mpr:source', '(', 'mpr:source', '-crop', '682x38+430+782', '+repage',
+                 '-resize', '1312x73', ')', '-background', 'white', '-append', 'out.png']
+
+
+def test_setBackend_unknown(backend):
+  with pytest.raises(ValueError):
+    backend('gimp')
+
+
+def test_processImage_convert_failure(backend, tmp_path):
+  # a "convert" that exits with an error
+  backend('convert', [sys.executable, '-c', 'import sys; sys.exit(3)'])
+
+  with pytest.raises(RuntimeError):
+    processImage(str(tmp_path / 'in.png'), str(tmp_path / 'out.png'), [crop('10x10+0+0')])
+
+
+def writeImage(fileName, size, color):
+  from PIL import Image
+  Image.new('RGB', size, color).save(fileName)
+
+
+def test_runImageTasks_after(backend, tmp_path):
+  pytest.importorskip('PIL')
+  from PIL import Image
+  backend('pillow')
+  writeImage(str(tmp_path / 'in.png'), (40, 30), 'red')
+  first, second = str(tmp_path / 'first.png'), str(tmp_path / 'second.png')
+
+  # the second task reads the image the first one writes, so it has to wait for it
+  tasks = [image_tools.ImageTask(first, second, [crop('10x10+0+0')], after=[first]),
+           image_tools.ImageTask(str(tmp_path / 'in.png'), first, [crop('20x20+0+0')])]
+
+  assert image_tools.runImageTasks(tasks, max_workers=2) == (2, 0)
+  with Image.open(first) as img:
+    assert img.size == (20, 20)
+  with Image.open(second) as img:
+    assert img.size == (10, 10)
+
+
+def test_runImageTasks_failure_skips_after(backend, tmp_path):
+  pytest.importorskip('PIL')
+  backend('pillow')
+  first, second = str(tmp_path / 'first.png'), str(tmp_path / 'second.png')
+
+  tasks = [image_tools.ImageTask(str(tmp_path / 'missing.png'), first, [crop('20x20+0+0')]),
+           image_tools.ImageTask(first, second, [crop('10x10+0+0')], after=[first])]
+
+  assert image_tools.runImageTasks(tasks, max_workers=2) == (0, 2)
+  assert not (tmp_path / 'second.png').exists()
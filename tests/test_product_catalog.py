@@ -0,0 +1,64 @@
+"""
+Tests of product_catalog.buildJobs.
+
+The expected urls and image names in ./tests/data/ were written by the download_daily_images_all.py script of before product_catalog.py
+(one downloadLink call per image, GEOS image urls replaced by the GEOS page they are found on), for the forecast of 2026-08-26.
+"""
+
+from datetime import datetime, timedelta
+import os
+
+import pytest
+
+from download_daily_images_all import sourceKey
+from product_catalog import ForecastDates, buildJobs
+
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+all_switches = ['brammer_tropical_waves', 'GOES16_sat', 'meteosat_sat', 'mimic_tpw', 'nhc_analysis', 'sal_split',
+                'nasa_geos', 'nasa_geos_cross_section', 'ECMWF_prediction',
+                'uwincm_650mbRH', 'uwincm_boundaryLayer', 'uwincm_clouds_current', 'uwincm_clouds', 'uwincm_precipitation', 'uwincm_surfaceWind',
+                'uwincm_650mbRH_animation', 'uwincm_boundaryLayer_animation', 'uwincm_clouds_animation', 'uwincm_precipitation_animation', 'uwincm_surfaceWind_animation',
+                'uutah_precipitation', 'uutah_precipitation_animation', 'ucdavis_precipitation_animation', 'mpas_outlook',
+                'UTAH_website', 'icap_aerosol_ensemble']
+
+
+def fixedDates():
+  day = datetime(2026, 8, 26)
+  return ForecastDates(today=day, today_m=day - timedelta(days=1), forecast_day1=day + timedelta(days=1), forecast_day2=day + timedelta(days=2),
+                       still_image_forecast_hr=16, nFrames_uwincm=12, model_day1=True, model_day2=True, dust_xLon=15, dust_xLat=20)
+
+
+def baselineJobs(fileName):
+  with open(os.path.join(data_dir, fileName), 'r') as fl:
+    return [tuple(line.split(' ')) for line in fl.read().splitlines()]
+
+
+@pytest.mark.parametrize('switches_off, fileName', [([], 'baseline_urls_all_on.txt'),
+                                                     (['UTAH_website', 'icap_aerosol_ensemble'], 'baseline_urls_default.txt')])
+def test_buildJobs_matches_baseline(switches_off, fileName):
+  switches = {switch: switch not in switches_off for switch in all_switches}
+
+  jobs = buildJobs(switches, fixedDates(), 'figs', verbose=False)
+
+  assert [(sourceKey(job), os.path.basename(job.imageName)) for job in jobs] == baselineJobs(fileName)
+  assert all(os.path.dirname(job.imageName) == 'figs' for job in jobs)
+
+
+def test_buildJobs_only():
+  switches = {switch: True for switch in all_switches}
+
+  jobs = buildJobs(switches, fixedDates(), 'figs', only=['nhc_analysis', 'mimic_tpw'], verbose=False)
+
+  assert [os.path.basename(job.imageName) for job in jobs] == ['NHC_surface_analysis.gif', 'NHC_2day_outlook.png', 'NHC_5day_outlook.png',
+                                                               'MIMIC-TPW_24h_animation.gif']
+
+
+def test_buildJobs_switched_off():
+  switches = {switch: False for switch in all_switches}
+  switches['sal_split'] = True
+
+  jobs = buildJobs(switches, fixedDates(), 'figs', verbose=False)
+
+  assert [job.switch for job in jobs] == ['sal_split']
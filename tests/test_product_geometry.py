@@ -0,0 +1,25 @@
+"""
+Tests of product_geometry.buildTasks.
+"""
+
+import os
+
+from product_geometry import buildTasks, mimicFrameName
+
+
+def test_mimicFrameName():
+  assert mimicFrameName('MIMIC-TPW_24h_animation-3.png') == 'MIMIC-TPW_24h_animation-03.png'
+  assert mimicFrameName('MIMIC-TPW_24h_animation-12.png') == 'MIMIC-TPW_24h_animation-12.png'
+  assert mimicFrameName('MIMIC-TPW_latest.png') == 'MIMIC-TPW_latest.png'
+
+
+def test_buildTasks_mimic_final_names():
+  fileNames = ['MIMIC-TPW_24h_animation-0.png', 'MIMIC-TPW_24h_animation-1.png', 'MIMIC-TPW_latest.png', 'NHC_2day_outlook.png']
+
+  tasks = buildTasks({'mimic_tpw': True}, fileNames, 'figs', 'figs_cropped')
+
+  # the frames are written under the names the movies and the stage cache use, nothing is renamed afterwards
+  assert [(os.path.basename(task.inName), task.outName) for task in tasks] == [
+    ('MIMIC-TPW_24h_animation-0.png', os.path.join('figs_cropped', 'MIMIC-TPW_24h_animation-00.png')),
+    ('MIMIC-TPW_24h_animation-1.png', os.path.join('figs_cropped', 'MIMIC-TPW_24h_animation-01.png')),
+    ('MIMIC-TPW_latest.png', os.path.join('figs_cropped', 'MIMIC-TPW_latest.png'))]
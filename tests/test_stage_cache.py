@@ -0,0 +1,137 @@
+"""
+Tests of stage_cache.py, and of the images and movies it lets runImageTasks and animateFiles skip.
+"""
+
+import os
+
+import pytest
+
+import stage_cache
+from stage_cache import isCurrent, loadStageCache, rememberOutputs, saveStageCache, stageDigest
+
+
+@pytest.fixture(autouse=True)
+def emptyCache(monkeypatch):
+  monkeypatch.setattr(stage_cache, 'stage_cache', {})
+  monkeypatch.setattr(stage_cache, 'stage_cache_file', None)
+  monkeypatch.setattr(stage_cache, 'file_digests', {})
+
+
+def writeFile(fileName, content):
+  with open(fileName, 'w') as fl:
+    fl.write(content)
+  # a new modification time, even on file systems with a coarse clock
+  info = os.stat(fileName)
+  os.utime(fileName, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+
+def test_stageDigest_inputs_and_recipe(tmp_path):
+  inName = str(tmp_path / 'in.png')
+  writeFile(inName, 'first')
+  digest = stageDigest([inName], ('crop', '10x10+0+0'))
+
+  assert stageDigest([inName], ('crop', '10x10+0+0')) == digest
+  assert stageDigest([inName], ('crop', '20x10+0+0')) != digest
+  assert stageDigest([str(tmp_path / 'missing.png')], ('crop', '10x10+0+0')) is None
+
+  writeFile(inName, 'second')
+  assert stageDigest([inName], ('crop', '10x10+0+0')) != digest
+
+  # the same content again gives the same digest (e.g. an image downloaded again that did not change)
+  writeFile(inName, 'first')
+  assert stageDigest([inName], ('crop', '10x10+0+0')) == digest
+
+
+def test_isCurrent(tmp_path):
+  inName, outName = str(tmp_path / 'in.png'), str(tmp_path / 'out.png')
+  writeFile(inName, 'image')
+  digest = stageDigest([inName], ['steps'])
+
+  assert not isCurrent([outName], digest)
+
+  writeFile(outName, 'processed')
+  rememberOutputs([outName], digest)
+  assert isCurrent([outName], digest)
+  assert not isCurrent([outName], None)
+
+  # new inputs or steps
+  writeFile(inName, 'new image')
+  assert not isCurrent([outName], stageDigest([inName], ['steps']))
+  assert not isCurrent([outName], stageDigest([inName], ['other steps']))
+
+  # the output was changed or removed since it was written
+  writeFile(outName, 'edited by hand')
+  assert not isCurrent([outName], digest)
+  rememberOutputs([outName], digest)
+  os.remove(outName)
+  assert not isCurrent([outName], digest)
+
+
+def test_rememberOutputs_forgets(tmp_path):
+  outName = str(tmp_path / 'out.png')
+  writeFile(outName, 'processed')
+  rememberOutputs([outName], 'digest')
+
+  rememberOutputs([outName], None)
+
+  assert not isCurrent([outName], 'digest')
+
+
+def test_save_and_load(tmp_path):
+  outName, cacheFile = str(tmp_path / 'out.png'), str(tmp_path / '.stage_cache.json')
+  writeFile(outName, 'processed')
+  rememberOutputs([outName], 'digest')
+  saveStageCache(cacheFile)
+
+  stage_cache.stage_cache = {}
+  loadStageCache(cacheFile)
+
+  assert isCurrent([outName], 'digest')
+
+
+def test_runImageTasks_cached(monkeypatch, tmp_path):
+  pytest.importorskip('PIL')
+  from PIL import Image
+  import image_tools
+  monkeypatch.setattr(image_tools, 'image_backend', 'pillow')
+  inName, outName = str(tmp_path / 'in.png'), str(tmp_path / 'out.png')
+  Image.new('RGB', (40, 30), 'red').save(inName)
+
+  tasks = [image_tools.ImageTask(inName, outName, [image_tools.crop('20x20+0+0')])]
+  assert image_tools.runImageTasks(tasks, max_workers=1, cached=True) == (1, 0)
+  written = os.stat(outName).st_mtime_ns
+
+  # nothing changed: the image is not processed again
+  assert image_tools.runImageTasks(tasks, max_workers=1, cached=True) == (1, 0)
+  assert os.stat(outName).st_mtime_ns == written
+
+  # other steps: it is
+  tasks = [image_tools.ImageTask(inName, outName, [image_tools.crop('10x10+0+0')])]
+  assert image_tools.runImageTasks(tasks, max_workers=1, cached=True) == (1, 0)
+  with Image.open(outName) as img:
+    assert img.size == (10, 10)
+
+
+def test_animateFiles_cached(tmp_path):
+  pytest.importorskip('PIL')
+  from PIL import Image
+  from animation_tools import animateFiles
+  fileNames = []
+  for num, color in enumerate(['red', 'green']):
+    fileNames.append(str(tmp_path / ('frame_' + str(num) + '.png')))
+    Image.new('RGB', (16, 16), color).save(fileNames[-1])
+  outName = str(tmp_path / 'movie.gif')
+
+  assert animateFiles(fileNames, outName, cached=True)
+  written = os.stat(outName).st_mtime_ns
+  assert animateFiles(fileNames, outName, cached=True)
+  assert os.stat(outName).st_mtime_ns == written
+
+  # a frame changed
+  Image.new('RGB', (16, 16), 'blue').save(fileNames[1])
+  info = os.stat(fileNames[1])
+  os.utime(fileNames[1], ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+  assert animateFiles(fileNames, outName, cached=True)
+  with Image.open(outName) as img:
+    img.seek(1)
+    assert img.convert('RGB').getpixel((0, 0)) == (0, 0, 255)
@@ -0,0 +1,110 @@
+"""
+Tests of task_graph.runGraph and criticalPath.
+"""
+
+import threading
+import time
+
+import pytest
+
+from task_graph import GraphNode, criticalPath, runGraph
+
+
+def recorder():
+  # steps that write down when they start and end, and return the given result
+  events = []
+  lock = threading.Lock()
+
+  def step(name, ok=True, wait=0.0):
+    def run():
+      with lock:
+        events.append(('start', name))
+      time.sleep(wait)
+      with lock:
+        events.append(('end', name))
+      if isinstance(ok, Exception):
+        raise ok
+      return ok
+    return run
+
+  return events, step
+
+
+def test_runGraph_order():
+  events, step = recorder()
+  nodes = [GraphNode('crop:nhc', step('crop:nhc'), after=('download:nhc',)),
+           GraphNode('download:nhc', step('download:nhc', wait=0.05)),
+           GraphNode('download:mimic', step('download:mimic', wait=0.01)),
+           GraphNode('move', step('move'), after=('crop:nhc', 'download:mimic'))]
+
+  results = runGraph(nodes)
+
+  assert all(results[name].ok for name in ['crop:nhc', 'download:nhc', 'download:mimic', 'move'])
+  for node in nodes:
+    for name in node.after:
+      assert events.index(('end', name)) < events.index(('start', node.name))
+  # steps that do not need each other overlap
+  assert events.index(('start', 'download:mimic')) < events.index(('end', 'download:nhc'))
+
+
+def test_runGraph_limits():
+  running, most = [0], [0]
+  lock = threading.Lock()
+
+  def run():
+    with lock:
+      running[0] += 1
+      most[0] = max(most[0], running[0])
+    time.sleep(0.02)
+    with lock:
+      running[0] -= 1
+    return True
+
+  nodes = [GraphNode('crop:' + str(num), run, resource='cpu') for num in range(4)]
+
+  results = runGraph(nodes, limits={'cpu': 1})
+
+  assert all(result.ok for result in results.values())
+  assert most[0] == 1
+
+
+def test_runGraph_failure():
+  events, step = recorder()
+  nodes = [GraphNode('download:nhc', step('download:nhc', ok=False)),
+           GraphNode('crop:nhc', step('crop:nhc'), after=('download:nhc',)),
+           GraphNode('join:nhc', step('join:nhc'), after=('crop:nhc',)),
+           GraphNode('move', step('move'), after=('join:nhc',), skip=False),
+           GraphNode('download:mimic', step('download:mimic', ok=RuntimeError('no connection'))),
+           GraphNode('crop:mimic', step('crop:mimic'), after=('download:mimic',))]
+
+  results = runGraph(nodes)
+
+  assert results['download:nhc'].ok is False
+  assert results['download:mimic'].ok is False
+  # the steps after a step that did not work are skipped, down the whole chain
+  assert results['crop:nhc'].ok is None
+  assert results['join:nhc'].ok is None
+  assert results['crop:mimic'].ok is None
+  assert ('start', 'crop:nhc') not in events and ('start', 'crop:mimic') not in events
+  # unless they are run anyway (skip=False)
+  assert results['move'].ok is True
+
+
+def test_runGraph_bad_graph():
+  with pytest.raises(ValueError):
+    runGraph([GraphNode('crop:nhc', lambda: True, after=('download:nhc',))])
+
+  with pytest.raises(ValueError):
+    runGraph([GraphNode('a', lambda: True, after=('b',)), GraphNode('b', lambda: True, after=('a',))])
+
+
+def test_criticalPath():
+  events, step = recorder()
+  nodes = [GraphNode('download:nhc', step('download:nhc', wait=0.05)),
+           GraphNode('download:mimic', step('download:mimic')),
+           GraphNode('crop', step('crop'), after=('download:nhc', 'download:mimic')),
+           GraphNode('move', step('move'), after=('crop',))]
+
+  results = runGraph(nodes)
+
+  assert criticalPath(nodes, results) == ['download:nhc', 'crop', 'move']